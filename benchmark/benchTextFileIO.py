@@ -0,0 +1,96 @@
+## \file benchTextFileIO.py
+#  \brief Benchmark of TextFileObj reads and writes
+#
+# Compares the bulk reads and writes of TextFileObj with reading and writing
+# one line at a time, on files with many short lines.
+#
+# Usage: python benchmark/benchTextFileIO.py [--lines N] [--line-length N] [--repeat N]
+#
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..")))
+from pytomation.fileTypes.DirFileObj import DirFileObj
+from pytomation.fileTypes.TextFileObj import TextFileObj
+
+## Reads a file one line at a time.
+#
+# \param path String with path of file
+# \return List of strings with lines
+def readLines(path):
+	lineList = []
+	with open(path) as file:
+		fileLine = file.readline()
+		while fileLine:
+			lineList.append(fileLine.strip("\n"))
+			fileLine = file.readline()
+	return lineList
+
+## Writes a file one line at a time.
+#
+# \param path String with path of file
+# \param lineList List of strings with lines
+def writeLines(path, lineList):
+	with open(path, "w") as file:
+		for line in lineList:
+			file.write(line+"\n")
+
+## Gets the best time of running a function a number of times.
+#
+# \param func Function to be timed
+# \param repeat Integer with number of runs
+# \return Float with seconds
+def bestTime(func, repeat):
+	timeList = []
+	for idx in range(repeat):
+		start = time.perf_counter()
+		func()
+		timeList.append(time.perf_counter() - start)
+	return min(timeList)
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark of TextFileObj reads and writes")
+	parser.add_argument("--lines", type=int, default=1000000, help="Number of lines of file")
+	parser.add_argument("--line-length", type=int, default=20, help="Number of characters of each line")
+	parser.add_argument("--repeat", type=int, default=5, help="Number of runs, the best one is reported")
+	args = parser.parse_args()
+
+	tmpDir = tempfile.mkdtemp(prefix="benchTextFileIO.")
+	try:
+		srcPath = tmpDir+"/src.txt"
+		line = ("x" * args.line_length)
+		writeLines(srcPath, [line] * args.lines)
+		size = os.path.getsize(srcPath)
+		dirObj = DirFileObj(path=tmpDir)
+		textObj = TextFileObj(path=srcPath)
+		# Edited copy, so it is written from memory and not copied from its source
+		copyObj = textObj.copy(name="copy.txt", father=dirObj)
+		copyObj.strSub(line, line.upper())
+		lineList = readLines(srcPath)
+		copyObj.write()
+
+		# Written file is removed, so it is not taken as the source of the copy
+		def writeCopy():
+			os.remove(copyObj.path)
+			copyObj._setModified()
+			copyObj.write()
+
+		resultList = [
+			("read",   lambda: readLines(srcPath),                          lambda: TextFileObj(path=srcPath)),
+			("write",  lambda: writeLines(tmpDir+"/lines.txt", lineList),   writeCopy),
+		]
+		print("%d lines of %d characters (%.1f MB), best of %d runs" % (args.lines, args.line_length, size / 1e6, args.repeat))
+		print("%-8s %14s %14s %8s" % ("", "line by line", "TextFileObj", "speedup"))
+		for (name, lineFunc, bulkFunc) in resultList:
+			lineTime = bestTime(lineFunc, args.repeat)
+			bulkTime = bestTime(bulkFunc, args.repeat)
+			print("%-8s %10.1f MB/s %10.1f MB/s %7.1fx" % (name, size / lineTime / 1e6, size / bulkTime / 1e6, lineTime / bulkTime))
+	finally:
+		shutil.rmtree(tmpDir)
+
+if __name__ == "__main__":
+	main()
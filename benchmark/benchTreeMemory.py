@@ -0,0 +1,51 @@
+## \file benchTreeMemory.py
+#  \brief Benchmark of memory used by each node of a tree
+#
+# Reads a synthetic tree of many small files and measures, with tracemalloc,
+# the memory allocated by the whole DirFileObj. With empty files (the
+# default), that is the overhead of the nodes themselves: objects, names,
+# paths and dictionaries of kids.
+#
+# Usage: python benchmark/benchTreeMemory.py [--depth N] [--fan-out N] [--file-count N] [--file-size N]
+#
+
+import os
+import sys
+import gc
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..")))
+from pytomation.fileTypes.DirFileObj import DirFileObj
+from treeGenerator import generateTree
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark of memory used by each node of a tree")
+	parser.add_argument("--depth", type=int, default=4, help="Number of levels of directories, including root")
+	parser.add_argument("--fan-out", type=int, default=6, help="Number of subdirectories of each directory")
+	parser.add_argument("--file-count", type=int, default=20, help="Number of files in each directory")
+	parser.add_argument("--file-size", type=int, default=0, help="Approximate number of characters of each file")
+	args = parser.parse_args()
+
+	tmpDir = tempfile.mkdtemp(prefix="benchTreeMemory.")
+	try:
+		treePath = os.path.join(tmpDir, "tree")
+		(dirCount, fileCount, size) = generateTree(treePath, args.depth, args.fan_out, args.file_count, args.file_size, 60)
+		gc.collect()
+		tracemalloc.start()
+		dirObj = DirFileObj(path=treePath)
+		gc.collect()
+		(current, peak) = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		nodeCount = dirCount + fileCount
+		print("Tree with %d directories and %d files (%.1f MB)" % (dirCount, fileCount, size / 1e6))
+		print("%-16s %12.1f KB" % ("total", current / 1e3))
+		print("%-16s %12.1f KB" % ("peak", peak / 1e3))
+		print("%-16s %12.1f B" % ("per node", current / nodeCount))
+		del dirObj
+	finally:
+		shutil.rmtree(tmpDir)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,172 @@
+## \file runBenchmarks.py
+#  \brief Benchmark suite of fileTypes
+#
+# Generates a synthetic tree in a temporary directory and times reading,
+# getStr, substitutions, copying and writing it. Each operation is timed
+# several times, from a fresh state, and the best time is kept. Peak memory
+# allocated by each operation is measured in a separate run with tracemalloc,
+# so tracing does not slow down timed runs.
+#
+# Results are written as JSON, and can be compared with the results of
+# another commit:
+#
+#   python benchmark/runBenchmarks.py --output before.json
+#   (checkout another commit)
+#   python benchmark/runBenchmarks.py --output after.json --compare before.json
+#
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..")))
+from pytomation.fileTypes.DirFileObj import DirFileObj
+from treeGenerator import generateTree
+
+## Gets the commit of the repository, if it is a git repository.
+#
+# \return String with commit, or None.
+def getCommit():
+	try:
+		return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.realpath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+	except Exception:
+		return None
+
+## Iterates through all text files of a tree.
+#
+# \param dirObj DirFileObj
+# \return List of TextFileObj
+def getFileList(dirObj):
+	return dirObj.glob("**/*.txt")
+
+## Operations of the suite. Each one has a setup function, that is not timed,
+# and an operation taking what setup returned.
+#
+# \param treePath String with path of generated tree
+# \param outPath String with path of a directory where trees can be written
+# \return List of tuples with name, setup function and operation.
+def getOperationList(treePath, outPath):
+	def newOutDir():
+		if os.path.exists(outPath):
+			shutil.rmtree(outPath)
+		os.mkdir(outPath)
+		return DirFileObj(path=outPath)
+	def readCopy():
+		return DirFileObj(path=treePath).copy(name="copy", father=newOutDir())
+	def readEditedCopy():
+		copyObj = readCopy()
+		for fileObj in getFileList(copyObj):
+			fileObj.strSub("File", "Doc")
+		return copyObj
+	return [
+		("read",       lambda: None,                       lambda state: DirFileObj(path=treePath)),
+		("getStr",     lambda: DirFileObj(path=treePath),  lambda dirObj: [fileObj.getStr() for fileObj in getFileList(dirObj)]),
+		("strSub",     lambda: DirFileObj(path=treePath),  lambda dirObj: [fileObj.strSub("File", "Doc") for fileObj in getFileList(dirObj)]),
+		("strSubMany", lambda: DirFileObj(path=treePath),  lambda dirObj: dirObj.strSubMany({"File": "Doc", "Line": "Row", "alpha": "omega"})),
+		("copy",       lambda: (DirFileObj(path=treePath), newOutDir()), lambda state: state[0].copy(name="copy", father=state[1])),
+		("write",      readCopy,                           lambda copyObj: copyObj.write()),
+		("writeEdited", readEditedCopy,                    lambda copyObj: copyObj.write()),
+	]
+
+## Times an operation.
+#
+# \param setup Function returning the state taken by operation
+# \param operation Function to be timed
+# \param repeat Integer with number of timed runs
+# \return Tuple with best time in seconds and peak memory in bytes.
+def runOperation(setup, operation, repeat):
+	timeList = []
+	for idx in range(repeat):
+		state = setup()
+		start = time.perf_counter()
+		operation(state)
+		timeList.append(time.perf_counter() - start)
+	# Memory allocated by operation only
+	state = setup()
+	tracemalloc.start()
+	try:
+		operation(state)
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+	return (min(timeList), peak)
+
+## Prints results, compared with results of another run if given.
+#
+# \param result Dictionary with results
+# \param baseResult Optional dictionary with results of another run
+def printResult(result, baseResult=None):
+	tree = result["tree"]
+	print("Tree with %d directories and %d files (%.1f MB), best of %d runs" % (tree["dirCount"], tree["fileCount"], tree["size"] / 1e6, result["params"]["repeat"]))
+	if baseResult is None:
+		print("%-12s %12s %14s" % ("", "time (ms)", "peak (KB)"))
+		for (name, opResult) in result["operations"].items():
+			print("%-12s %12.2f %14.1f" % (name, opResult["seconds"] * 1e3, opResult["peakBytes"] / 1e3))
+		return
+	if baseResult["params"] != result["params"]:
+		print("Warning: results were taken with other parameters: %s" % json.dumps(baseResult["params"]))
+	print("Compared with commit %s" % baseResult.get("commit"))
+	print("%-12s %12s %12s %8s %14s %14s %8s" % ("", "base (ms)", "time (ms)", "ratio", "base peak (KB)", "peak (KB)", "ratio"))
+	for (name, opResult) in result["operations"].items():
+		baseOpResult = baseResult["operations"].get(name)
+		if baseOpResult is None:
+			print("%-12s %12s %12.2f %8s %14s %14.1f %8s" % (name, "-", opResult["seconds"] * 1e3, "-", "-", opResult["peakBytes"] / 1e3, "-"))
+			continue
+		print("%-12s %12.2f %12.2f %7.2fx %14.1f %14.1f %7.2fx" % (name,
+			baseOpResult["seconds"] * 1e3, opResult["seconds"] * 1e3, opResult["seconds"] / max(baseOpResult["seconds"], 1e-9),
+			baseOpResult["peakBytes"] / 1e3, opResult["peakBytes"] / 1e3, opResult["peakBytes"] / max(baseOpResult["peakBytes"], 1)))
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark suite of fileTypes")
+	parser.add_argument("--depth", type=int, default=3, help="Number of levels of directories, including root")
+	parser.add_argument("--fan-out", type=int, default=4, help="Number of subdirectories of each directory")
+	parser.add_argument("--file-count", type=int, default=10, help="Number of files in each directory")
+	parser.add_argument("--file-size", type=int, default=4096, help="Approximate number of characters of each file")
+	parser.add_argument("--line-length", type=int, default=60, help="Approximate number of characters of each line")
+	parser.add_argument("--seed", type=int, default=0, help="Seed of contents of files")
+	parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs, the best one is kept")
+	parser.add_argument("--operations", nargs="+", help="Operations to run. Defaults to all of them")
+	parser.add_argument("--output", help="Path of JSON file where results are written")
+	parser.add_argument("--compare", help="Path of JSON file with results to compare with")
+	args = parser.parse_args()
+
+	params = {
+		"depth": args.depth, "fanOut": args.fan_out, "fileCount": args.file_count,
+		"fileSize": args.file_size, "lineLength": args.line_length, "seed": args.seed, "repeat": args.repeat,
+	}
+	tmpDir = tempfile.mkdtemp(prefix="runBenchmarks.")
+	try:
+		treePath = os.path.join(tmpDir, "tree")
+		(dirCount, fileCount, size) = generateTree(treePath, args.depth, args.fan_out, args.file_count, args.file_size, args.line_length, args.seed)
+		result = {
+			"commit": getCommit(),
+			"python": platform.python_version(),
+			"params": params,
+			"tree": {"dirCount": dirCount, "fileCount": fileCount, "size": size},
+			"operations": {},
+		}
+		for (name, setup, operation) in getOperationList(treePath, os.path.join(tmpDir, "out")):
+			if args.operations and name not in args.operations:
+				continue
+			(seconds, peak) = runOperation(setup, operation, args.repeat)
+			result["operations"][name] = {"seconds": seconds, "peakBytes": peak}
+	finally:
+		shutil.rmtree(tmpDir)
+
+	baseResult = None
+	if args.compare:
+		with open(args.compare) as file:
+			baseResult = json.load(file)
+	printResult(result, baseResult)
+	if args.output:
+		with open(args.output, "w") as file:
+			json.dump(result, file, indent=2)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,66 @@
+## \file treeGenerator.py
+#  \brief Generates synthetic trees of directories and text files
+#
+# Trees are described by their depth, number of subdirectories and files in
+# each directory, size of files and length of their lines. Contents are
+# pseudo-random words, taken from a seed, so the same parameters always give
+# the same tree.
+#
+
+import os
+import random
+
+## Words used in contents of files
+WORD_LIST = ["alpha", "beta", "gamma", "delta", "File", "Line", "pytomation", "Sample", "Regexp", "x"]
+
+## Generates the contents of a text file.
+#
+# \param rand random.Random used to pick words
+# \param fileSize Integer with approximate number of characters
+# \param lineLength Integer with approximate number of characters of each line
+# \return String with contents, ending with a line break.
+def generateText(rand, fileSize, lineLength):
+	lineList = []
+	size = 0
+	while size < fileSize:
+		wordList = []
+		length = 0
+		while length < lineLength:
+			word = rand.choice(WORD_LIST)
+			wordList.append(word)
+			length += len(word) + 1
+		line = " ".join(wordList)
+		lineList.append(line)
+		size += len(line) + 1
+	return "".join(line + "\n" for line in lineList)
+
+## Generates a tree of directories and text files.
+#
+# \param rootPath String with path of root directory, that must not exist
+# \param depth Integer with number of levels of directories, including root
+# \param fanOut Integer with number of subdirectories of each directory
+# \param fileCount Integer with number of files in each directory
+# \param fileSize Integer with approximate number of characters of each file
+# \param lineLength Integer with approximate number of characters of each line
+# \param seed Optional integer with seed of contents
+# \return Tuple with number of directories, number of files and total size in bytes.
+def generateTree(rootPath, depth, fanOut, fileCount, fileSize, lineLength, seed=0):
+	rand = random.Random(seed)
+	dirCount = 0
+	totalFileCount = 0
+	totalSize = 0
+	dirStack = [(rootPath, 1)]
+	while dirStack:
+		(dirPath, level) = dirStack.pop()
+		os.mkdir(dirPath)
+		dirCount += 1
+		for fileIdx in range(fileCount):
+			text = generateText(rand, fileSize, lineLength)
+			with open(os.path.join(dirPath, "file%d.txt" % fileIdx), "w") as file:
+				file.write(text)
+			totalFileCount += 1
+			totalSize += len(text)
+		if level < depth:
+			for dirIdx in range(fanOut):
+				dirStack.append((os.path.join(dirPath, "dir%d" % dirIdx), level + 1))
+	return (dirCount, totalFileCount, totalSize)
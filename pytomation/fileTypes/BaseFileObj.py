@@ -10,11 +10,42 @@
 
 import os
 import re
+import sys
+import asyncio
+import hashlib
+import functools
 import copy as cp
 from abc import ABC, abstractmethod
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+# ioctl request cloning a file into another (reflink), on Linux
+_FICLONE = 0x40049409
+
+# FileMetrics where operations are recorded, or None when metrics are disabled
+_metrics = None
+
+## Validates a limit of concurrent tasks.
+#
+# \param limit Integer with maximum number of concurrent tasks
+def _checkLimit(limit):
+	if isinstance(limit, bool) or not isinstance(limit, int):
+		raise TypeError("Parameter limit must be an integer")
+	if limit < 1:
+		raise ValueError("Parameter limit must be a positive number of tasks")
 
 class BaseFileObj(ABC):
 
+	## Attributes are stored in slots instead of a dictionary of each object,
+	# as trees may have millions of them
+	__slots__ = ("__name", "__fileDir", "__father", "__root", "__path", "__lazy", "__loaded",
+	             "__loading", "__diskStat", "__hash", "__modified", "__dirty")
+
+	## Kind of file in names of operations recorded by FileMetrics
+	_metricKind = "File"
+
 	## Constructor
 	#
 	# Create the object depending on the
@@ -22,8 +53,10 @@ class BaseFileObj(ABC):
 	# \param path Optional String with path of file
 	# \param name Optional String with name of file
 	# \param father Optional BaseFileObj that is the father of this file
+	# \param lazy Optional Boolean. If True, contents are only read when first
+	#             needed. By default, kids inherit the mode of their father.
 	# \param self Instance of BaseFileObj class.
-	def __init__(self, path="", name="", father=None):
+	def __init__(self, path="", name="", father=None, lazy=None):
 
 		# Default father is self
 		if father is None:
@@ -39,6 +72,8 @@ class BaseFileObj(ABC):
 			raise TypeError("Parameter path must be a string")
 		if not isinstance(father, BaseFileObj):
 			raise TypeError("Parameter father must be a BaseFileObj")
+		if lazy is not None and not isinstance(lazy, bool):
+			raise TypeError("Parameter lazy must be a boolean")
 
 		# Constructor takes either the path or name+father
 		if path == "":
@@ -47,12 +82,7 @@ class BaseFileObj(ABC):
 			if name == "" or father == self:
 				raise RuntimeError("Read invalid parameters. Constructor takes either the path or name+father.")
 			# In this case, validate that first father is root
-			currObj = self
-			fatherObj = father
-			while currObj != fatherObj:
-				currObj = fatherObj
-				fatherObj = currObj.father
-			if not fatherObj.isRoot():
+			if not father.root.isRoot():
 				raise RuntimeError("Couldnt find a root father when trying to create new object.")
 		else:
 			if name != "" or father != self:
@@ -78,26 +108,57 @@ class BaseFileObj(ABC):
 			else:
 				raise RuntimeError("Failed to extract name and fileDir from path %s." % path)
 
-		# Store attributes name
-		self.__name    = name
+		# Store attributes name. Names are interned, so the many files with the
+		# same name share it.
+		self.__name    = sys.intern(name)
 		self.__fileDir = fileDir
 		self.__father  = father
+		# Store root and path, so they are not searched for every time
+		self.__setPath()
 
-		# Check if file exists
-		try:
-			checkPath = os.path.exists(self.path)
-		except Exception as e:
-			raise RuntimeError("Error trying to check if path %s exists: %s" % (self.__fileDir ,str(e)))
+		# Kids inherit the lazy mode of their father
+		if lazy is None:
+			lazy = father.isLazy() if father != self else False
+		self.__lazy    = lazy
+
+		# Check if file exists. Kids created while their father lists its
+		# directory get the stat it listed, instead of taking it again.
+		listed = father._isListed(self.__name) if father != self else False
+		stat = father._getListedStat(self.__name) if listed else None
+		if stat is not None:
+			checkPath = True
+		else:
+			try:
+				checkPath = os.path.exists(self.path)
+			except Exception as e:
+				raise RuntimeError("Error trying to check if path %s exists: %s" % (self.__fileDir ,str(e)))
 
-		# If exists, read file in
-		if checkPath:
-			# Call read method
-			self.__read()
+		# Nothing to be read if file does not exist
+		self.__loaded  = not checkPath
+		self.__loading = False
+		# Stat of file when it was last read or written, to tell if it changed on
+		# disk since. Until it is read, stat it was listed with, if any.
+		self.__diskStat = stat
+		# Content hash, computed when first needed
+		self.__hash     = None
+		# Files start clean, new ones are flagged as modified once added to their father
+		self.__modified = False
+		self.__dirty    = False
+
+		# If exists, read file in. Lazy files are read when first needed, and
+		# kids created while their father is being read are read by the father.
+		if checkPath and not lazy and (father == self or not father.__loading):
+			self._loadAll()
 
 		# If not root, update its father
 		if not self.isRoot():
 			self.father._isNewFather(kid=self)
 
+		# Files that are not on disk yet must be written. Entries listed on disk
+		# that cannot be read, as broken symbolic links, are never written.
+		if not checkPath and not listed:
+			self._setModified()
+
 	## Gets name.
 	#
 	# \param  self Instance of BaseFileObj class.
@@ -112,14 +173,30 @@ class BaseFileObj(ABC):
 	# \return String.
 	@property
 	def path(self):
+		return self.__path
+
+	## Gets root, the first father of this file.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return BaseFileObj.
+	@property
+	def root(self):
+		return self.__root
+
+	## Private __setPath method. Updates stored root and path from father.
+	# Must be called whenever father or name changes.
+	#
+	# \param  self Instance of BaseFileObj class.
+	def __setPath(self):
 		# Get path
-		if self.isRoot():
+		if self.__father is self:
+			self.__root = self
 			path = self.__fileDir
 		else:
-			path = self.father.path
+			self.__root = self.__father.__root
+			path = self.__father.__path
 		# Add name
-		path = path + "/" + self.name
-		return path
+		self.__path = path + "/" + self.__name
 
 	## Gets father.
 	#
@@ -135,7 +212,118 @@ class BaseFileObj(ABC):
 	# \return Boolean.
 	def isRoot(self):
 		# Root files dont have a father
-		return (self.father == self)
+		return (self.__father is self)
+
+	## Checks if file is lazy, meaning its contents are only read when first needed.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return Boolean.
+	def isLazy(self):
+		return self.__lazy
+
+	## Protected _setLazy method. Changes lazy mode of file.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param lazy Boolean.
+	def _setLazy(self, lazy):
+		self.__lazy = lazy
+
+	## Checks if the contents of file were already read.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return Boolean.
+	def isLoaded(self):
+		return self.__loaded
+
+	## Checks if file was modified (contents changed, kid added or kid removed)
+	# since it was read or written.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return Boolean.
+	def isModified(self):
+		return self.__modified
+
+	## Checks if file or anything it contains was modified, meaning something
+	# must be written by write.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return Boolean.
+	def isDirty(self):
+		return self.__dirty
+
+	## Protected _setModified method. Flags file as modified and flags it and
+	# all its fathers as dirty.
+	#
+	# \param  self Instance of BaseFileObj class.
+	def _setModified(self):
+		self._resetHash()
+		self.__modified = True
+		# Fathers of a dirty file are always dirty, so stop at first dirty one
+		currObj = self
+		while not currObj.__dirty:
+			currObj.__dirty = True
+			if currObj.isRoot():
+				break
+			currObj = currObj.father
+
+	## Protected _setWritten method. Flags file as written, meaning it and
+	# everything it contains are clean.
+	#
+	# \param  self Instance of BaseFileObj class.
+	def _setWritten(self):
+		self.__modified = False
+		self.__dirty    = False
+		self.__diskStat = self._statKey(self.__path)
+
+	## Gets a hash of contents of file, as they would be written. Directories
+	# combine the hashes of everything they contain, so two objects have the
+	# same hash if and only if their contents are the same.
+	#
+	# Hash is computed when first needed, and kept until file or anything it
+	# contains changes.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return Bytes with digest.
+	def getHash(self):
+		if self.__hash is None:
+			self.__hash = self._hashFile()
+		return self.__hash
+
+	## Protected _isHashed method.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return Boolean. True if hash was computed and is still valid.
+	def _isHashed(self):
+		return self.__hash is not None
+
+	## Protected _resetHash method. Drops hash of file and of all its fathers,
+	# as their contents changed.
+	#
+	# \param  self Instance of BaseFileObj class.
+	def _resetHash(self):
+		# Hashes of fathers are only computed from hashes of their kids, so
+		# fathers of a file without hash have none either
+		currObj = self
+		while currObj.__hash is not None:
+			currObj.__hash = None
+			if currObj.isRoot():
+				break
+			currObj = currObj.father
+
+	## Protected _newDigest method. Creates the hash object used for digests.
+	#
+	# \return hashlib hash object.
+	@staticmethod
+	def _newDigest():
+		return hashlib.blake2b(digest_size=32)
+
+	## Protected _hashFile method. Must be specialized by inheriting classes.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return Bytes with digest.
+	@abstractmethod
+	def _hashFile(self):
+		return NotImplemented
 
 	## Protected _isNewFather method. Must be specialized by inheriting classes.
 	#
@@ -150,8 +338,224 @@ class BaseFileObj(ABC):
 	#
 	# \param  self Instance of BaseFileObj class.
 	def __read(self):
+		# Contents are restored from snapshot of root instead, if they did not
+		# change on disk
+		state = self.__root._findSnapshot(self.__path[len(self.__root.__path)+1:])
+		if state is not None and self._restoreSnapshot(state):
+			return
 		self._readFile()
 
+	## Protected _findSnapshot method. Gets the snapshot state of an object
+	# this root contains, so it is only used once. Can be specialized by
+	# inheriting classes.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param relPath String with path relative to this object ("" for itself)
+	# \return Snapshot state, or None if there is none.
+	def _findSnapshot(self, relPath):
+		return None
+
+	## Protected _takeSnapshot method. Gets a state that restores contents of
+	# file as they are on disk. Can be specialized by inheriting classes.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return Picklable snapshot state, or None if contents cannot be restored.
+	def _takeSnapshot(self):
+		return None
+
+	## Protected _restoreSnapshot method. Restores contents of file from a
+	# snapshot state, if file did not change on disk since. Can be specialized
+	# by inheriting classes.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param state Snapshot state taken by _takeSnapshot.
+	# \return Boolean. True if contents were restored.
+	def _restoreSnapshot(self, state):
+		return False
+
+	## Protected _load method. Reads contents of file if they were not read yet.
+	# Kids are created but not read.
+	#
+	# \param  self Instance of BaseFileObj class.
+	def _load(self):
+		if self.__loaded:
+			return
+		self.__loaded  = True
+		self.__loading = True
+		# Stat is taken before reading, so changes made while reading are seen by
+		# refresh. It is set first, so readers can share it with _getDiskStat.
+		# Stat file was listed or refreshed with is used instead, if there is one.
+		prevStat = self.__diskStat
+		stat = prevStat if prevStat is not None else self._statKey(self.__path)
+		self.__diskStat = stat
+		try:
+			if _metrics is None:
+				self.__read()
+			else:
+				self._timeOp("read", self.__read, None if stat is None else stat[2])
+		except BaseException:
+			self.__diskStat = prevStat
+			raise
+		finally:
+			self.__loading = False
+		self._resetHash()
+
+	## Protected _loadAll method. Reads contents of file and of everything it
+	# contains. Can be specialized by inheriting classes.
+	#
+	# \param  self Instance of BaseFileObj class.
+	def _loadAll(self):
+		self._load()
+
+	## Refreshes contents of file that changed on disk since they were read or
+	# written. Unsaved edits are kept, and reported as conflicts if file also
+	# changed on disk.
+	#
+	# \param  self Instance of BaseFileObj class.
+	# \return List of Strings with paths of conflicts.
+	def refresh(self):
+		conflictList = []
+		self._refreshFile(self._statKey(self.__path), conflictList)
+		return conflictList
+
+	## Protected _refreshFile method. Reads file again if it changed on disk and
+	# was not edited. Can be specialized by inheriting classes.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param stat Tuple with inode, modification time and size of file on disk,
+	#             or None if it does not exist.
+	# \param conflictList List where paths of conflicts are added.
+	# \return Boolean. False if file was removed from disk and can be removed
+	#         from its father, as it has no unsaved edits.
+	def _refreshFile(self, stat, conflictList):
+		# Removed from disk
+		if stat is None:
+			if not self.__dirty:
+				return False
+			if self.__diskStat is not None:
+				conflictList.append(self.__path)
+			return True
+		# Nothing to refresh if contents were not read yet, or did not change
+		if not self.__loaded or not self._isChangedOnDisk(stat):
+			return True
+		# Keep unsaved edits
+		if self.__modified:
+			conflictList.append(self.__path)
+			return True
+		# Read again, with the stat that was just taken
+		self.__loaded   = False
+		self.__diskStat = stat
+		self._load()
+		return True
+
+	## Protected _isChangedOnDisk method. Checks if file changed on disk since
+	# it was read or written.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param stat Tuple with inode, modification time and size of file on disk,
+	#             or None if it does not exist.
+	# \return Boolean.
+	def _isChangedOnDisk(self, stat):
+		return stat != self.__diskStat
+
+	## Protected _getDiskStat method. Gets the stat of file when it was last
+	# read or written. While file is read, it is the stat taken just before.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \return Tuple with inode, modification time and size, or None.
+	def _getDiskStat(self):
+		return self.__diskStat
+
+	## Protected _setDiskStat method. Sets the stat of file, once it is in sync
+	# with disk again.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param stat Tuple with inode, modification time and size, or None.
+	def _setDiskStat(self, stat):
+		self.__diskStat = stat
+
+	## Protected _getListedStat method. Gets the stat of a kid, if this object
+	# is listing its kids and took it. Can be specialized by inheriting classes.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param name String with name of kid
+	# \return Tuple with inode, modification time and size, or None if unknown.
+	def _getListedStat(self, name):
+		return None
+
+	## Protected _isListed method. Checks if a kid is being created from an
+	# entry this object is listing. Can be specialized by inheriting classes.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param name String with name of kid
+	# \return Boolean.
+	def _isListed(self, name):
+		return False
+
+	## Protected _statKey method. Gets the inode, modification time and size of
+	# a path.
+	#
+	# \param path String with path
+	# \return Tuple with inode, modification time and size, or None if path
+	#         does not exist.
+	@staticmethod
+	def _statKey(path):
+		try:
+			stat = os.stat(path)
+		except OSError:
+			return None
+		return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+	## Coroutine creating an object, that reads its contents without blocking
+	# the event loop. Contents are read by tasks run in the default executor of
+	# the loop, at most limit at a time.
+	#
+	# \param cls Class of object to be created.
+	# \param limit Optional integer with maximum number of concurrent reads
+	# \param kwargs Parameters of constructor.
+	# \return Created object.
+	@classmethod
+	async def aread(cls, limit=16, **kwargs):
+		_checkLimit(limit)
+		lazy = kwargs.pop("lazy", None)
+		if lazy is not None and not isinstance(lazy, bool):
+			raise TypeError("Parameter lazy must be a boolean")
+		father = kwargs.get("father")
+		if lazy is None:
+			lazy = father.isLazy() if isinstance(father, BaseFileObj) else False
+		# Constructor only checks path, contents are read by tasks
+		loop = asyncio.get_event_loop()
+		fileObj = await loop.run_in_executor(None, functools.partial(cls, lazy=True, **kwargs))
+		if lazy:
+			return fileObj
+		await fileObj._aloadAll(asyncio.Semaphore(limit))
+		return fileObj
+
+	## Protected _aloadAll coroutine. Reads contents of file and of everything
+	# it contains, and leaves lazy mode. Can be specialized by inheriting classes.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param semaphore asyncio.Semaphore limiting concurrent reads.
+	async def _aloadAll(self, semaphore):
+		async with semaphore:
+			await asyncio.get_event_loop().run_in_executor(None, self._load)
+		self.__lazy = False
+
+	## Coroutine writing file without blocking the event loop. See write.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param limit Optional integer with maximum number of concurrent writes
+	async def awrite(self, limit=16):
+		_checkLimit(limit)
+		await asyncio.get_event_loop().run_in_executor(None, self.write)
+
+	## Coroutine refreshing file without blocking the event loop. See refresh.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \return List of Strings with paths of conflicts.
+	async def arefresh(self):
+		return await asyncio.get_event_loop().run_in_executor(None, self.refresh)
+
 	## Protected readFile method. Must be specialized by inheriting classes.
 	#
 	# \param  self Instance of BaseFileObj class.
@@ -167,7 +571,14 @@ class BaseFileObj(ABC):
 		# Checks before writing
 		if self.isRoot() and self.path == "":
 			raise RuntimeError("Unexpected error found while trying to write root file. No path found.")
-		self._writeFile()
+		# Nothing to write if nothing changed
+		if not self.__dirty:
+			return
+		if _metrics is None:
+			self._writeFile()
+		else:
+			self._timeOp("write", self._writeFile)
+		self._setWritten()
 
 	## Protected _writeFile method. Must be specialized by inheriting classes.
 	#
@@ -191,6 +602,27 @@ class BaseFileObj(ABC):
 		if not isinstance(father, BaseFileObj):
 			raise TypeError("Parameter father must be a BaseFileObj")
 
+		# Copy is taken from contents in memory, so read whatever was not read yet
+		self._loadAll()
+
+		objCopy = self._copyNode(name, father)
+
+		# Execute specialized copy method
+		if _metrics is None:
+			objCopy._copyFile()
+		else:
+			objCopy._timeOp("copy", objCopy._copyFile)
+
+		return objCopy
+
+	## Protected _copyNode method. Copies this object alone, that must be read,
+	# to a new father. Whatever it contains is copied by _copyFile.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param name String with name of file
+	# \param father BaseFileObj that is the father of this file
+	# \return Created copy
+	def _copyNode(self, name, father):
 		# Store prev name and father to backup later
 		prevName   = self.__name
 		prevDir    = self.__fileDir
@@ -205,12 +637,17 @@ class BaseFileObj(ABC):
 		self.__name   = prevName
 		self.__fileDir    = prevDir
 		self.__father = prevFather
+		# Copy has a new root and path
+		objCopy.__setPath()
 
 		# Update father with new copy
 		father._isNewFather(kid=objCopy)
 
-		# Execute specialized copy method
-		objCopy._copyFile()
+		# Copy is not on disk yet, so it must be written
+		objCopy.__modified = False
+		objCopy.__dirty    = False
+		objCopy.__diskStat = None
+		objCopy._setModified()
 
 		return objCopy
 
@@ -220,3 +657,107 @@ class BaseFileObj(ABC):
 	@abstractmethod
 	def _copyFile(self):
 		return NotImplemented
+
+	## Sets the FileMetrics where reads, writes and copies of all files are
+	# recorded. See FileMetrics.enable.
+	#
+	# \param metrics FileMetrics, or None to disable metrics
+	# \return FileMetrics that was set before, or None.
+	@staticmethod
+	def setMetrics(metrics):
+		global _metrics
+		prevMetrics = _metrics
+		_metrics = metrics
+		return prevMetrics
+
+	## Gets the FileMetrics where operations are recorded.
+	#
+	# \return FileMetrics, or None if metrics are disabled.
+	@staticmethod
+	def getMetrics():
+		return _metrics
+
+	## Protected _timeOp method. Runs an operation of this file, recording it
+	# in enabled metrics.
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param operation String with "read", "write" or "copy"
+	# \param func Function running operation
+	# \param size Optional integer with number of bytes of operation. Files
+	#             that are written are measured once written.
+	def _timeOp(self, operation, func, size=None):
+		metrics = _metrics
+		if metrics is None:
+			func()
+			return
+		with metrics.span(operation + self._metricKind, self.__path) as span:
+			func()
+			# Only bytes of files are counted
+			if self._metricKind != "File":
+				return
+			if operation == "write":
+				stat = self._statKey(self.__path)
+				size = None if stat is None else stat[2]
+			span.size = size
+
+	## Protected _isSameFile method. Checks if two paths are the same file.
+	#
+	# \param path0 String with path
+	# \param path1 String with path
+	# \return Boolean. False if either one does not exist.
+	@staticmethod
+	def _isSameFile(path0, path1):
+		try:
+			return os.path.samefile(path0, path1)
+		except OSError:
+			return False
+
+	## Protected _copyFileData method. Copies contents of a file to another
+	# without passing them through Python, when possible.
+	#
+	# Tries, in order, a reflink (blocks are shared by filesystems that support
+	# it), os.copy_file_range, os.sendfile and finally a buffered copy.
+	#
+	# \param srcPath String with path of file to be copied
+	# \param dstPath String with path of new file
+	@staticmethod
+	def _copyFileData(srcPath, dstPath):
+		with open(srcPath, "rb") as srcFile, open(dstPath, "wb") as dstFile:
+			srcFd = srcFile.fileno()
+			dstFd = dstFile.fileno()
+			size  = os.fstat(srcFd).st_size
+			# Reflink
+			if fcntl is not None and sys.platform.startswith("linux"):
+				try:
+					fcntl.ioctl(dstFd, _FICLONE, srcFd)
+					return
+				except OSError:
+					pass
+			# Kernel copies, that may not be supported between these files
+			for copyFunc in [getattr(os, "copy_file_range", None), getattr(os, "sendfile", None)]:
+				if copyFunc is None:
+					continue
+				try:
+					offset = 0
+					while offset < size:
+						if copyFunc is os.sendfile:
+							copied = os.sendfile(dstFd, srcFd, offset, size - offset)
+						else:
+							copied = copyFunc(srcFd, dstFd, size - offset, offset, offset)
+						if copied == 0:
+							break
+						offset += copied
+					if offset >= size:
+						return
+				except OSError:
+					pass
+				# Start again with next method
+				dstFile.seek(0)
+				dstFile.truncate()
+			# Buffered copy
+			srcFile.seek(0)
+			while True:
+				buf = srcFile.read(1 << 20)
+				if not buf:
+					break
+				dstFile.write(buf)
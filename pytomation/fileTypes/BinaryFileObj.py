@@ -0,0 +1,208 @@
+## \file BinaryFileObj.py
+#  \brief Edits binary files
+#
+# Handles files that are not text, such as images, archives and compiled
+# artifacts. Contents are kept as bytes, never decoded nor split in lines.
+#
+# Revision | Author            | Date     | Comment
+#:---------|:------------------|:---------|:------------------------------------
+# 1.0      | pytomation team   | 10/18/26 | Initial version
+#
+
+import os
+import codecs
+import shutil
+from pytomation.fileTypes.BaseFileObj import BaseFileObj
+
+class BinaryFileObj(BaseFileObj):
+
+	__slots__ = ("__data", "__srcPath", "__srcStat")
+
+	## Number of bytes read from the start of a file to tell if it is binary
+	sniffSize = 1 << 13
+
+	## Constructor
+	#
+	# Create the object depending on the
+	#
+	# \param self Instance of BaseFileObj class.
+	# \param path Optional String with path of file
+	# \param name Optional String with name of file
+	# \param father Optional BaseFileObj that is the father of this file
+	# \param lazy Optional Boolean. If True, contents are only read when first needed
+	def __init__(self, path="", name="", father=None, lazy=None):
+		# Initializes its contents. Contents are immutable bytes, so copies of a
+		# file can share them until either one is edited.
+		self.__data    = b""
+		# Initializes source file, that contents were read from while they are
+		# not edited
+		self.__srcPath = None
+		self.__srcStat = None
+		# Calls super constructor
+		super(BinaryFileObj, self).__init__(path=path, name=name, father=father, lazy=lazy)
+
+	## Protected _isNewFather method
+	#
+	# \param self Instance of BinaryFileObj class.
+	# \param kid Instance of BaseFileObj class.
+	def _isNewFather(self, kid):
+		raise RuntimeError("BinaryFileObj cannot be a father")
+
+	## Checks if a file is binary, from its first sniffSize bytes. Files with
+	# NUL bytes or that are not valid UTF-8 are binary. Files that cannot be
+	# read (e.g. broken symbolic links) are taken as text.
+	#
+	# \param path String with path of file
+	# \return Boolean.
+	@classmethod
+	def isBinaryFile(cls, path):
+		# Validate input type
+		if not isinstance(path, str):
+			raise TypeError("Parameter path must be a string")
+		try:
+			with open(path, "rb") as file:
+				head = file.read(cls.sniffSize)
+		except OSError:
+			return False
+		if b"\0" in head:
+			return True
+		# A character may be cut at the end of head, so do not decode it as final
+		try:
+			codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+		except UnicodeDecodeError:
+			return True
+		return False
+
+	## Private _writeFile method.
+	#
+	# \param  self Instance of BinaryFileObj class.
+	def _writeFile(self):
+		# Check if folder exists
+		path = os.path.dirname(self.path)
+		if not os.path.exists(path):
+			raise RuntimeError("Tried to write a file in invalid location %s" % path)
+		# Make sure contents were read before overwriting the file
+		self._load()
+		# Remove a directory found in its place
+		if os.path.isdir(self.path) and not os.path.islink(self.path):
+			try:
+				shutil.rmtree(self.path)
+			except Exception as e:
+				raise RuntimeError("Error writing BinaryFileObj to path %s. Unexpected when removing old dir: %s" % (self.path,str(e)))
+		# Files that were not edited are copied from their source file, if it did not change
+		if self.__srcPath is not None and self._statKey(self.__srcPath) == self.__srcStat:
+			if not BaseFileObj._isSameFile(self.__srcPath, self.path):
+				try:
+					BaseFileObj._copyFileData(self.__srcPath, self.path)
+				except Exception as e:
+					raise RuntimeError("Error writing BinaryFileObj to path %s. Unexpected when copying from %s: %s" % (self.path, self.__srcPath, str(e)))
+		else:
+			# Create file
+			with open(self.path, "wb") as file:
+				file.write(self.__data)
+		# File is now the source of its contents
+		self.__srcPath = self.path
+		self.__srcStat = self._statKey(self.__srcPath)
+
+	## Private readFile method.
+	#
+	# \param  self Instance of BinaryFileObj class.
+	def _readFile(self):
+		self.__srcPath = self.path
+		# Stat taken by _load is shared, instead of keeping another tuple
+		self.__srcStat = self._getDiskStat()
+		with open(self.path, "rb") as file:
+			self.__data = file.read()
+
+	## Protected _takeSnapshot method. Contents can only be restored if they
+	# were not edited and their source file did not change.
+	#
+	# \param  self Instance of BinaryFileObj class.
+	# \return Tuple ("binary", stat of file, contents) or None.
+	def _takeSnapshot(self):
+		if self.__srcPath != self.path:
+			return None
+		if self.__srcStat is None or self._statKey(self.__srcPath) != self.__srcStat:
+			return None
+		return ("binary", self.__srcStat, self.__data)
+
+	## Protected _restoreSnapshot method.
+	#
+	# \param self Instance of BinaryFileObj class.
+	# \param state Snapshot state taken by _takeSnapshot.
+	# \return Boolean. True if contents were restored.
+	def _restoreSnapshot(self, state):
+		if state[0] != "binary":
+			return False
+		(kind, stat, data) = state
+		self.__srcPath = self.path
+		self.__srcStat = self._getDiskStat()
+		if self.__srcStat != stat:
+			return False
+		self.__data = data
+		return True
+
+	## Private _copyFile method.
+	#
+	# \param  self Instance of BinaryFileObj class.
+	def _copyFile(self):
+		# Contents are shared with the original, as they are never changed in place
+		pass
+
+	## Substitutes a byte pattern in file.
+	#
+	# \param self Instance of BinaryFileObj class.
+	# \param findBytes Bytes to be replaced.
+	# \param replaceBytes Bytes used in replacement.
+	def bytesSub(self, findBytes, replaceBytes):
+		# Checks inputs
+		if not isinstance(findBytes, bytes):
+			raise TypeError("Parameter findBytes must be bytes")
+		if not isinstance(replaceBytes, bytes):
+			raise TypeError("Parameter replaceBytes must be bytes")
+		if findBytes == b"":
+			raise ValueError("Parameter findBytes cannot be empty")
+		# Make sure contents were read
+		self._load()
+		# Only update contents if something changed
+		if findBytes in self.__data:
+			self.__setData(self.__data.replace(findBytes, replaceBytes))
+
+	## Private __setData method. Updates contents after an edit, and flags file
+	# to be written.
+	#
+	# \param self Instance of BinaryFileObj class.
+	# \param data Bytes with contents of file.
+	def __setData(self, data):
+		self.__data    = data
+		# Contents are not the ones of source file anymore
+		self.__srcPath = None
+		self.__srcStat = None
+		self._setModified()
+
+	## Protected _hashFile method.
+	#
+	# \param  self Instance of BinaryFileObj class.
+	# \return Bytes with digest.
+	def _hashFile(self):
+		digest = self._newDigest()
+		digest.update(self.getView())
+		return digest.digest()
+
+	## Returns bytes with contents of file.
+	#
+	# \param  self Instance of BinaryFileObj class.
+	# \return Bytes
+	def getBytes(self):
+		# Make sure contents were read
+		self._load()
+		return self.__data
+
+	## Returns a read-only view of contents of file, without copying them.
+	#
+	# \param  self Instance of BinaryFileObj class.
+	# \return Memoryview
+	def getView(self):
+		# Make sure contents were read
+		self._load()
+		return memoryview(self.__data)
@@ -9,12 +9,313 @@
 #
 
 import os
+import re
+import time
 import shutil
-from pytomation.fileTypes.BaseFileObj import BaseFileObj
+import struct
+import heapq
+import asyncio
+import tempfile
+import functools
+import contextlib
+from types import MappingProxyType
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pytomation.fileTypes.BaseFileObj import BaseFileObj, _checkLimit
 from pytomation.fileTypes.TextFileObj import TextFileObj
+from pytomation.fileTypes.BinaryFileObj import BinaryFileObj
+
+## Validates an executor parameter.
+#
+# \param executor None, concurrent.futures.Executor or integer with number of workers
+def _checkExecutor(executor):
+	if executor is None:
+		return
+	if isinstance(executor, bool) or not isinstance(executor, (int, Executor)):
+		raise TypeError("Parameter executor must be an integer or a concurrent.futures.Executor")
+	if isinstance(executor, int) and executor < 1:
+		raise ValueError("Parameter executor must be a positive number of workers")
+
+## Context manager yielding an executor. Creates a pool, that is shut down on
+# exit, if executor is the number of workers.
+#
+# \param executor concurrent.futures.Executor or integer with number of workers
+# \param poolClass Optional class of pool created for a number of workers
+@contextlib.contextmanager
+def _executorContext(executor, poolClass=ThreadPoolExecutor):
+	if isinstance(executor, int):
+		with poolClass(max_workers=executor) as pool:
+			yield pool
+	else:
+		yield executor
+
+## Splits items in batches with total sizes as close as possible, giving
+# each item, largest first, to the batch with the smallest total so far.
+#
+# \param sizeList List of integers with size of each item
+# \param batchCount Integer with maximum number of batches
+# \return List of lists with indexes of items in each batch.
+def _balanceBatches(sizeList, batchCount):
+	batchList = [[] for idx in range(min(batchCount, len(sizeList)))]
+	heap = [(0, idx) for idx in range(len(batchList))]
+	for itemIdx in sorted(range(len(sizeList)), key=lambda idx: sizeList[idx], reverse=True):
+		(total, batchIdx) = heapq.heappop(heap)
+		batchList[batchIdx].append(itemIdx)
+		heapq.heappush(heap, (total + sizeList[itemIdx], batchIdx))
+	return batchList
+
+## Replaces a match of a string mapping. Used instead of a lambda, so edits
+# can be sent to other processes.
+#
+# \param mapping Dictionary with strings to be replaced as keys, and strings
+#                used in replacement as values.
+# \param match Match of a key of mapping
+# \return String with replacement.
+def _strMapRepl(mapping, match):
+	return mapping[match.group(0)]
+
+## Applies edits to contents of text files. Runs in worker processes of
+# DirFileObj.transform, so it only takes and returns picklable values.
+#
+# \param editList List of edits, as compiled by DirFileObj.__compileEdits
+# \param textList List of strings with contents of files
+# \return List with new contents of each file, or None if it did not change.
+def _transformBatch(editList, textList):
+	resultList = []
+	for text in textList:
+		text = TextFileObj._normStr(text)
+		changed = False
+		for edit in editList:
+			if edit[0] == "strSub":
+				newText = TextFileObj._subStr(text, edit[1], edit[2])
+			else:
+				newText = TextFileObj._regexpSubStr(text, edit[1], edit[2])
+			if newText is not None:
+				text = newText
+				changed = True
+		resultList.append(text if changed else None)
+	return resultList
+
+## Translates a glob pattern into a regexp matching relative paths. Wildcards
+# *, ? and [...] do not match /, and a ** component matches any number of
+# directories (or everything below, when it is the last component).
+#
+# \param pattern String with glob pattern
+# \return Compiled regexp
+def _globRegexp(pattern):
+	nameList = [name for name in pattern.split("/") if name not in ("", ".")]
+	if not nameList:
+		raise ValueError("Invalid glob pattern %s" % pattern)
+	regexp = ""
+	for (idx, name) in enumerate(nameList):
+		isLast = (idx == len(nameList) - 1)
+		if name == "**":
+			regexp += "[^/]+(?:/[^/]+)*" if isLast else "(?:[^/]+/)*"
+			continue
+		pos = 0
+		while pos < len(name):
+			char = name[pos]
+			pos += 1
+			if char == "*":
+				regexp += "[^/]*"
+			elif char == "?":
+				regexp += "[^/]"
+			elif char == "[":
+				# Character class, where a leading ! negates it and a leading ] is literal
+				end = pos
+				if name[end:end+1] == "!":
+					end += 1
+				if name[end:end+1] == "]":
+					end += 1
+				end = name.find("]", end)
+				if end < 0:
+					regexp += re.escape(char)
+					continue
+				charClass = name[pos:end].replace("\\", "\\\\")
+				pos = end + 1
+				if charClass.startswith("!"):
+					charClass = "^/" + charClass[1:]
+				elif charClass.startswith("^"):
+					charClass = "\\" + charClass
+				regexp += "[%s]" % charClass
+			else:
+				regexp += re.escape(char)
+		if not isLast:
+			regexp += "/"
+	return re.compile(regexp)
+
+## Bytes starting snapshot files, followed by their version
+_SNAPSHOT_MAGIC = b"pytomation-snapshot\0"
+## Version of snapshot files. Snapshots of other versions are ignored.
+_SNAPSHOT_VERSION = 3
+## Files modified this close (in ns) to when a snapshot is taken may change
+# again without changing their modification time, so they are not in it.
+_SNAPSHOT_RACY_NS = 2 * 10**9
+## Layouts of integers in snapshot files: lengths and counts, and stats
+# (inode, modification time and size)
+_SNAPSHOT_LEN  = struct.Struct("<Q")
+_SNAPSHOT_STAT = struct.Struct("<QqQ")
+
+## Reads a snapshot file. Snapshots only hold data (strings, bytes and
+# integers), so reading one never runs any code.
+#
+# \param snapshot String with path of snapshot file
+# \return Dictionary with snapshot, or None if it does not exist or is not valid.
+def _readSnapshot(snapshot):
+	try:
+		with open(snapshot, "rb") as file:
+			reader = _SnapshotReader(file.read())
+		return reader.readSnapshot()
+	except (OSError, ValueError):
+		return None
+
+## Writes a snapshot file, as a header with its version and the path of its
+# tree, followed by states, each one with its relative path. Strings and
+# bytes are prefixed by their length.
+#
+# \param file File opened for binary writing
+# \param path String with path of tree
+# \param stateDict Dictionary with states taken by _takeSnapshot and by
+#                  saveSnapshot, by relative path.
+def _writeSnapshot(file, path, stateDict):
+	def writeBytes(data):
+		file.write(_SNAPSHOT_LEN.pack(len(data)))
+		file.write(data)
+	def writeStr(text):
+		writeBytes(text.encode("utf-8", "surrogatepass"))
+	def writeStat(stat):
+		if stat is None:
+			file.write(b"\0")
+		else:
+			file.write(b"\1" + _SNAPSHOT_STAT.pack(*stat))
+	file.write(_SNAPSHOT_MAGIC + _SNAPSHOT_LEN.pack(_SNAPSHOT_VERSION))
+	writeStr(path)
+	file.write(_SNAPSHOT_LEN.pack(len(stateDict)))
+	for (relPath, state) in stateDict.items():
+		writeStr(relPath)
+		writeStr(state[0])
+		writeStat(state[1])
+		if state[0] == "dir":
+			(kind, stat, dirNameList, fileStateList) = state
+			file.write(_SNAPSHOT_LEN.pack(len(dirNameList)))
+			for dirName in dirNameList:
+				writeStr(dirName)
+			file.write(_SNAPSHOT_LEN.pack(len(fileStateList)))
+			for (fileName, fileKind, fileStat) in fileStateList:
+				writeStr(fileName)
+				writeStr(fileKind or "")
+				writeStat(fileStat)
+		elif state[0] == "text":
+			(kind, stat, text, exact) = state
+			writeStr(text)
+			file.write(b"\1" if exact else b"\0")
+		else:
+			(kind, stat, data) = state
+			writeBytes(data)
+
+class _SnapshotReader(object):
+
+	__slots__ = ("__data", "__offset")
+
+	## Constructor
+	#
+	# \param self Instance of _SnapshotReader class.
+	# \param data Bytes of snapshot file
+	def __init__(self, data):
+		self.__data   = memoryview(data)
+		self.__offset = 0
+
+	## Reads a snapshot, as written by _writeSnapshot.
+	#
+	# \param self Instance of _SnapshotReader class.
+	# \return Dictionary with snapshot, or None if it is of another version.
+	def readSnapshot(self):
+		if self.__read(len(_SNAPSHOT_MAGIC)) != _SNAPSHOT_MAGIC:
+			raise ValueError("Invalid snapshot")
+		if self.__readLen() != _SNAPSHOT_VERSION:
+			return None
+		path = self.__readStr()
+		stateDict = {}
+		for idx in range(self.__readLen()):
+			relPath = self.__readStr()
+			kind = self.__readStr()
+			stat = self.__readStat()
+			if kind == "dir":
+				dirNameList = [self.__readStr() for dirIdx in range(self.__readLen())]
+				fileStateList = [(self.__readStr(), self.__readStr() or None, self.__readStat()) for fileIdx in range(self.__readLen())]
+				stateDict[relPath] = (kind, stat, dirNameList, fileStateList)
+			elif kind == "text":
+				stateDict[relPath] = (kind, stat, self.__readStr(), self.__read(1) == b"\1")
+			elif kind == "binary":
+				stateDict[relPath] = (kind, stat, self.__readBytes())
+			else:
+				raise ValueError("Invalid kind %s in snapshot" % kind)
+		if self.__offset != len(self.__data):
+			raise ValueError("Unexpected data at end of snapshot")
+		return {"path": path, "stateDict": stateDict}
+
+	## Private __read method.
+	#
+	# \param self Instance of _SnapshotReader class.
+	# \param size Integer with number of bytes
+	# \return Bytes.
+	def __read(self, size):
+		end = self.__offset + size
+		if end > len(self.__data):
+			raise ValueError("Snapshot is truncated")
+		data = self.__data[self.__offset:end].tobytes()
+		self.__offset = end
+		return data
+
+	## Private __readLen method.
+	#
+	# \param self Instance of _SnapshotReader class.
+	# \return Integer with a length or count.
+	def __readLen(self):
+		return _SNAPSHOT_LEN.unpack(self.__read(_SNAPSHOT_LEN.size))[0]
+
+	## Private __readBytes method.
+	#
+	# \param self Instance of _SnapshotReader class.
+	# \return Bytes prefixed by their length.
+	def __readBytes(self):
+		return self.__read(self.__readLen())
+
+	## Private __readStr method.
+	#
+	# \param self Instance of _SnapshotReader class.
+	# \return String prefixed by its length.
+	def __readStr(self):
+		return self.__readBytes().decode("utf-8", "surrogatepass")
+
+	## Private __readStat method.
+	#
+	# \param self Instance of _SnapshotReader class.
+	# \return Tuple with inode, modification time and size, or None.
+	def __readStat(self):
+		if self.__read(1) == b"\0":
+			return None
+		return _SNAPSHOT_STAT.unpack(self.__read(_SNAPSHOT_STAT.size))
+
+## Empty dictionary shared by every directory without kids, or that is not a
+# root and has no index. It is read-only, so it is never edited by mistake.
+_EMPTY_DICT = MappingProxyType({})
+
+## Gets the extension of a file name, used to index files by extension.
+#
+# \param name String with file name
+# \return String with extension, including the dot, or "" if there is none.
+def _getExt(name):
+	dotIdx = name.rfind(".")
+	return name[dotIdx:] if dotIdx >= 0 else ""
 
 class DirFileObj(BaseFileObj):
 
+	__slots__ = ("__executor", "__snapshot", "__srcStat", "__listing", "__dirDict", "__fileDict",
+	             "__unsniffed", "__indexed", "__pathIndex", "__nameIndex", "__extIndex")
+
+	## Kind of file in names of operations recorded by FileMetrics
+	_metricKind = "Dir"
+
 	## Constructor
 	#
 	# Create the object depending on the
@@ -23,12 +324,48 @@ class DirFileObj(BaseFileObj):
 	# \param path Optional String with path of file
 	# \param name Optional String with name of file
 	# \param father Optional BaseFileObj that is the father of this file
-	def __init__(self, path="", name="", father=None):
-		# Initializes contents (dictionary of subdirectories and dictionary of files, as text files)
-		self.__dirDict = {}
-		self.__fileDict = {}
+	# \param lazy Optional Boolean. If True, subdirectories and files are only
+	#             listed and read when first needed
+	# \param executor Optional concurrent.futures.Executor or integer with number
+	#                 of worker threads used to read subdirectories and files
+	#                 concurrently. By default, kids use the executor of their father.
+	# \param snapshot Optional String with path of a snapshot file saved by
+	#                 saveSnapshot. Directories and files that did not change on
+	#                 disk since are restored from it instead of being read.
+	def __init__(self, path="", name="", father=None, lazy=None, executor=None, snapshot=None):
+		# Validate executor, and inherit it from father by default
+		_checkExecutor(executor)
+		if executor is None and isinstance(father, DirFileObj):
+			executor = father.__executor
+		self.__executor = executor
+		# Read snapshot, only used by roots
+		if snapshot is not None:
+			if not isinstance(snapshot, str):
+				raise TypeError("Parameter snapshot must be a string")
+			if father is not None:
+				raise RuntimeError("Parameter snapshot can only be used by a root DirFileObj")
+			snapshot = _readSnapshot(snapshot)
+		self.__snapshot = snapshot
+		# Stat of directory when it was listed
+		self.__srcStat = None
+		# Stats of entries, by name, while kids are created from them
+		self.__listing = None
+		# Initializes contents (dictionary of subdirectories and dictionary of
+		# files). Dictionaries are created when first kid is added.
+		self.__dirDict = _EMPTY_DICT
+		self.__fileDict = _EMPTY_DICT
+		# Names of files listed from disk whose kind (text or binary) was not
+		# checked yet. Set is created when first one is listed.
+		self.__unsniffed = None
+		# Initializes index of everything a root contains, by relative path, by
+		# name and by extension. Other directories only flag if their kids are indexed.
+		self.__indexed   = False
+		isRoot = (father is None)
+		self.__pathIndex = {} if isRoot else _EMPTY_DICT
+		self.__nameIndex = {} if isRoot else _EMPTY_DICT
+		self.__extIndex  = {} if isRoot else _EMPTY_DICT
 		# Calls super constructor
-		super(DirFileObj, self).__init__(path=path, name=name, father=father)
+		super(DirFileObj, self).__init__(path=path, name=name, father=father, lazy=lazy)
 
 	## Protected _isNewFather method
 	#
@@ -43,43 +380,236 @@ class DirFileObj(BaseFileObj):
 			raise RuntimeError("Unexpected error when adding kid object that is a root")
 		if kid.father != self:
 			raise RuntimeError("Unexpected error when adding kid of another object")
+		# Make sure contents were listed, so kid can be checked against them
+		self._load()
 		# Get name of kid
 		kidName = kid.name
 		# Send kid to right place
-		if isinstance(kid, TextFileObj):
-			# Check if kid is not already in dictionary
-			if kidName in self.getFileList():
-				raise RuntimeError("File %s already present in dir %s. Cannot overwrite." % (kidName, self.path))
-			self.__fileDict[kidName] = kid
-		elif isinstance(kid, DirFileObj):
+		if isinstance(kid, DirFileObj):
 			# Check if kid is not already in dictionary
-			if kidName in self.getDirList():
+			if kidName in self.__dirDict:
 				raise RuntimeError("Dir %s already present in dir %s. Cannot overwrite." % (kidName, self.path))
+			if self.__dirDict is _EMPTY_DICT:
+				self.__dirDict = {}
 			self.__dirDict[kidName] = kid
+		else:
+			# Check if kid is not already in dictionary, unless it is replacing a
+			# file whose kind was just checked
+			if kidName in self.__fileDict and not (self.__listing is not None and kidName in (self.__unsniffed or ())):
+				raise RuntimeError("File %s already present in dir %s. Cannot overwrite." % (kidName, self.path))
+			if self.__fileDict is _EMPTY_DICT:
+				self.__fileDict = {}
+			self.__fileDict[kidName] = kid
+			self.__discardUnsniffed(kidName)
+		# Add kid, and whatever it already contains, to index of root
+		if self.__isIndexed():
+			self.__indexTree(kid)
+		self._resetHash()
 
-	## Private _writeFile method.
+	## Private __isIndexed method. Checks if kids of this directory are in the
+	# index of its root.
+	#
+	# \param  self Instance of DirFileObj class.
+	# \return Boolean.
+	def __isIndexed(self):
+		return self.__indexed or self.isRoot()
+
+	## Private __indexTree method. Adds an object and everything it contains to
+	# the index of root.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param kid Instance of BaseFileObj class.
+	# \param root Optional DirFileObj holding the index. Defaults to root.
+	def __indexTree(self, kid, root=None):
+		if root is None:
+			root = self.root
+		rootLen = len(root.path) + 1
+		objStack = [kid]
+		while objStack:
+			fileObj = objStack.pop()
+			relPath = fileObj.path[rootLen:]
+			root.__pathIndex[relPath] = fileObj
+			root.__nameIndex.setdefault(fileObj.name, {})[relPath] = fileObj
+			root.__extIndex.setdefault(_getExt(fileObj.name), {})[relPath] = fileObj
+			if isinstance(fileObj, DirFileObj):
+				fileObj.__indexed = (root is self.root)
+				# Kids of a copy that were not copied yet still belong to the original
+				objStack.extend(obj for obj in fileObj.__fileDict.values() if obj.father is fileObj)
+				objStack.extend(obj for obj in fileObj.__dirDict.values() if obj.father is fileObj)
+
+	## Private __unindexTree method. Removes an object and everything it
+	# contains from the index of root.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param kid Instance of BaseFileObj class.
+	def __unindexTree(self, kid):
+		root = self.root
+		rootLen = len(root.path) + 1
+		objStack = [kid]
+		while objStack:
+			fileObj = objStack.pop()
+			relPath = fileObj.path[rootLen:]
+			if root.__pathIndex.get(relPath) is fileObj:
+				del root.__pathIndex[relPath]
+				for (index, key) in [(root.__nameIndex, fileObj.name), (root.__extIndex, _getExt(fileObj.name))]:
+					bucket = index[key]
+					del bucket[relPath]
+					if not bucket:
+						del index[key]
+			if isinstance(fileObj, DirFileObj):
+				fileObj.__indexed = False
+				objStack.extend(fileObj.__fileDict.values())
+				objStack.extend(fileObj.__dirDict.values())
+
+	## Write method. Writes everything that changed in this directory.
+	#
+	# All modified directories are written first. Then, all modified files are
+	# written, concurrently if there is an executor. Writing goes on when a path
+	# fails, and all failing paths are reported at the end.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param executor Optional concurrent.futures.Executor or integer with number
+	#                 of worker threads used to write files. Defaults to the
+	#                 executor of this directory.
+	def write(self, executor=None):
+		# Validate input type
+		_checkExecutor(executor)
+		if executor is None:
+			executor = self.__executor
+		# Checks before writing
+		if self.isRoot() and self.path == "":
+			raise RuntimeError("Unexpected error found while trying to write root file. No path found.")
+		# Nothing to write if nothing changed
+		if not self.isDirty():
+			return
+		errorList = []
+		(dirList, fileList) = self.__writeDirs(errorList)
+		# Write files
+		if executor is None:
+			for fileObj in fileList:
+				try:
+					fileObj.write()
+				except Exception as e:
+					errorList.append((fileObj.path, e))
+		else:
+			with _executorContext(executor) as pool:
+				futureDict = {pool.submit(fileObj.write): fileObj for fileObj in fileList}
+				for future in futureDict:
+					try:
+						future.result()
+					except Exception as e:
+						errorList.append((futureDict[future].path, e))
+		self.__setDirsWritten(dirList)
+		self.__raiseWriteErrors(errorList)
+
+	## Coroutine writing everything that changed in this directory without
+	# blocking the event loop. Directories are written first by a single task,
+	# then files are written by tasks run in the default executor of the loop,
+	# at most limit at a time. See write.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param limit Optional integer with maximum number of concurrent writes
+	async def awrite(self, limit=16):
+		# Validate input type
+		_checkLimit(limit)
+		# Checks before writing
+		if self.isRoot() and self.path == "":
+			raise RuntimeError("Unexpected error found while trying to write root file. No path found.")
+		# Nothing to write if nothing changed
+		if not self.isDirty():
+			return
+		loop = asyncio.get_event_loop()
+		errorList = []
+		(dirList, fileList) = await loop.run_in_executor(None, self.__writeDirs, errorList)
+		# Write files
+		semaphore = asyncio.Semaphore(limit)
+		async def writeFile(fileObj):
+			async with semaphore:
+				try:
+					await loop.run_in_executor(None, fileObj.write)
+				except Exception as e:
+					errorList.append((fileObj.path, e))
+		await asyncio.gather(*[writeFile(fileObj) for fileObj in fileList])
+		self.__setDirsWritten(dirList)
+		self.__raiseWriteErrors(errorList)
+
+	## Private __writeDirs method. Writes modified directories top-down.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param errorList List where failing paths and their errors are added.
+	# \return Tuple with list of directories that were written or did not need
+	#         to be, and list of files to be written.
+	def __writeDirs(self, errorList):
+		dirList  = []
+		fileList = []
+		for (relPath, dirObj, dirNameList, fileNameList) in self.__walkDirs(True):
+			# Kids cannot be written without their directory
+			del dirNameList[:]
+			if dirObj.isModified():
+				try:
+					dirObj._timeOp("write", dirObj._writeFile)
+				except Exception as e:
+					errorList.append((dirObj.path, e))
+					continue
+			dirList.append(dirObj)
+			fileList.extend(fileObj for fileObj in dirObj.__fileDict.values() if fileObj.isDirty())
+			# Only walk into directories that changed
+			dirNameList.extend(dirName for (dirName, kid) in dirObj.__dirDict.items() if kid.isDirty())
+		return (dirList, fileList)
+
+	## Private __setDirsWritten method. Flags directories as written once
+	# everything they contain was written, bottom-up.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param dirList List of directories, top-down, returned by __writeDirs.
+	def __setDirsWritten(self, dirList):
+		for dirObj in reversed(dirList):
+			if not any(kid.isDirty() for kid in dirObj.__fileDict.values()) and \
+			   not any(kid.isDirty() for kid in dirObj.__dirDict.values()):
+				dirObj._setWritten()
+
+	## Private __raiseWriteErrors method. Reports every failing path.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param errorList List of failing paths and their errors.
+	def __raiseWriteErrors(self, errorList):
+		if errorList:
+			errorStr = "\n".join("%s: %s" % (path, str(e)) for (path, e) in errorList)
+			raise RuntimeError("Error writing DirFileObj to path %s. Failed to write %d path(s):\n%s" % (self.path, len(errorList), errorStr))
+
+	## Private _writeFile method. Creates this directory, or removes whatever
+	# is found on disk but not in it anymore, one entry at a time. Kids are
+	# written by write.
 	#
 	# \param  self Instance of DirFileObj class.
 	def _writeFile(self):
 		# Gets path
 		path = self.path
-		# Remove current folder if exists
-		if os.path.exists(path):
+		# Symbolic links to directories were read through, so they are written
+		# through too, instead of being replaced by an empty directory
+		if os.path.isdir(path):
+			# Remove entries that are not part of this directory anymore
 			try:
-				shutil.rmtree(path)
+				for entry in os.scandir(path):
+					if entry.is_dir():
+						if entry.name in self.__dirDict:
+							continue
+					elif entry.name in self.__fileDict:
+						continue
+					if entry.is_dir(follow_symlinks=False):
+						shutil.rmtree(entry.path)
+					else:
+						os.remove(entry.path)
 			except Exception as e:
-				raise RuntimeError("Error writing DirFileObj to path %s. Unexpected when removing old dir: %s" % (path,str(e)))
-		# Create folder
-		try:
-			os.mkdir(path)
-		except Exception as e:
-			raise RuntimeError("Error writing DirFileObj to path %s. Unexpected when creating new dir: %s" % (path,str(e)))
-		# Write all files it contains
-		for fileName in self.getFileList():
-			self.__fileDict[fileName].write()
-		# Write all dirs it contains
-		for dirName in self.getDirList():
-			self.__dirDict[dirName].write()
+				raise RuntimeError("Error writing DirFileObj to path %s. Unexpected when removing old entries: %s" % (path,str(e)))
+		else:
+			# Remove a file found in its place and create folder
+			try:
+				if os.path.lexists(path):
+					os.remove(path)
+				os.mkdir(path)
+			except Exception as e:
+				raise RuntimeError("Error writing DirFileObj to path %s. Unexpected when creating new dir: %s" % (path,str(e)))
 
 	## Private readFile method.
 	#
@@ -87,40 +617,755 @@ class DirFileObj(BaseFileObj):
 	def _readFile(self):
 		# Gets path
 		path = self.path
-		# Read everything
-		for (myPath, subdirList, fileList) in os.walk(path):
-			# Reads all sub directories
-			for subdirName in subdirList:
-				self.__dirDict[subdirName] = DirFileObj(name=subdirName, father=self)
-			# Reads all files
-			for fileName in fileList:
-				self.__fileDict[fileName] = TextFileObj(name=fileName, father=self)
-			# Avoid recursive reading
-			break
-
-	## Private _copyFile method.
-	#
-	# \param  self Instance of TextFileObj class.
+		# Stat taken by _load is shared, instead of keeping another tuple
+		self.__srcStat = self._getDiskStat()
+		# List entries once. Their type comes with the listing, and their stat is
+		# passed to kids, so they do not check again if they exist.
+		dirNameList  = []
+		fileNameList = []
+		listing = {}
+		try:
+			entryIter = os.scandir(path)
+		except OSError:
+			# Directories that cannot be listed are empty, as with os.walk
+			return
+		with entryIter:
+			for entry in entryIter:
+				try:
+					isDir = entry.is_dir()
+				except OSError:
+					isDir = False
+				if isDir:
+					dirNameList.append(entry.name)
+				else:
+					fileNameList.append(entry.name)
+				# Entries that cannot be stat, as broken symbolic links, are
+				# listed all the same, so their kids are not taken as new
+				try:
+					entryStat = entry.stat()
+				except OSError:
+					listing[entry.name] = None
+					continue
+				listing[entry.name] = (entryStat.st_ino, entryStat.st_mtime_ns, entryStat.st_size)
+		# Kids are added to this directory by _isNewFather
+		self.__createKids(listing, dirNameList, [(fileName, None) for fileName in fileNameList])
+
+	## Private __createKids method. Creates kids found on disk.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param listing Dictionary with stats of kids, by name, that are passed to them
+	# \param dirNameList List of names of directories
+	# \param fileList List of tuples with name of file and its kind ("text",
+	#                 "binary" or None if unknown)
+	def __createKids(self, listing, dirNameList, fileList):
+		self.__listing = listing
+		try:
+			for dirName in dirNameList:
+				DirFileObj(name=dirName, father=self)
+			for (fileName, fileKind) in fileList:
+				self.__newFile(fileName, fileKind)
+		finally:
+			self.__listing = None
+
+	## Protected _getListedStat method.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param name String with name of kid
+	# \return Tuple with inode, modification time and size, or None if unknown.
+	def _getListedStat(self, name):
+		if self.__listing is None:
+			return None
+		return self.__listing.get(name)
+
+	## Protected _isListed method.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param name String with name of kid
+	# \return Boolean. True if kid is being created from an entry on disk.
+	def _isListed(self, name):
+		return self.__listing is not None and name in self.__listing
+
+	## Private __newFile method. Creates a kid file read from disk. Files of
+	# unknown kind are created as text, without opening them, and their kind is
+	# checked by __sniffFile when they are first needed.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param fileName String with name of file
+	# \param kind Optional String with kind of file ("text" or "binary"), if known
+	# \return TextFileObj or BinaryFileObj
+	def __newFile(self, fileName, kind=None):
+		if kind == "binary":
+			return BinaryFileObj(name=fileName, father=self)
+		fileObj = TextFileObj(name=fileName, father=self)
+		if kind is None:
+			if self.__unsniffed is None:
+				self.__unsniffed = set()
+			self.__unsniffed.add(fileName)
+		return fileObj
+
+	## Private __sniffKind method. Checks the kind of a file on disk.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param fileName String with name of file
+	# \return String with kind of file ("text" or "binary").
+	def __sniffKind(self, fileName):
+		return "binary" if BinaryFileObj.isBinaryFile(self.path+"/"+fileName) else "text"
+
+	## Private __sniffFile method. Checks the kind of a file listed from disk, if
+	# it was not checked yet, replacing it by a BinaryFileObj if it is binary.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param fileName String with name of file
+	# \param isBinary Optional Boolean, if file was already checked
+	# \return TextFileObj or BinaryFileObj
+	def __sniffFile(self, fileName, isBinary=None):
+		fileObj = self.__fileDict[fileName]
+		if fileName not in (self.__unsniffed or ()):
+			return fileObj
+		# Files that were read already, as the ones missing on disk, stay text
+		if fileObj.isLoaded():
+			isBinary = False
+		elif isBinary is None:
+			isBinary = (self.__sniffKind(fileName) == "binary")
+		if not isBinary:
+			self.__discardUnsniffed(fileName)
+			return fileObj
+		# Replace it, with the stat it was listed with
+		stat = fileObj._getDiskStat()
+		self.__createKids({fileName: stat}, [], [(fileName, "binary")])
+		return self.__fileDict[fileName]
+
+	## Private __sniffFiles method. Checks the kind of all files of this
+	# directory that were not checked yet.
+	#
+	# \param self Instance of DirFileObj class.
+	def __sniffFiles(self):
+		for fileName in list(self.__unsniffed or ()):
+			self.__sniffFile(fileName)
+
+	## Private __sniffObj method. Checks the kind of a kid found in an index or
+	# dictionary, if it is a file.
+	#
+	# \param fileObj DirFileObj, TextFileObj or BinaryFileObj
+	# \return DirFileObj, TextFileObj or BinaryFileObj
+	@staticmethod
+	def __sniffObj(fileObj):
+		if isinstance(fileObj, DirFileObj):
+			return fileObj
+		return fileObj.father.__sniffFile(fileObj.name)
+
+	## Private __discardUnsniffed method. Flags a file as checked.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param fileName String with name of file
+	def __discardUnsniffed(self, fileName):
+		if self.__unsniffed is not None:
+			self.__unsniffed.discard(fileName)
+			if not self.__unsniffed:
+				self.__unsniffed = None
+
+	## Protected _findSnapshot method.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param relPath String with path relative to this directory ("" for itself)
+	# \return Snapshot state, or None if there is none.
+	def _findSnapshot(self, relPath):
+		snapshot = self.__snapshot
+		if snapshot is None:
+			return None
+		# Snapshot of another tree
+		if snapshot["path"] != self.path:
+			self.__snapshot = None
+			return None
+		return snapshot["stateDict"].pop(relPath, None)
+
+	## Protected _restoreSnapshot method. Kids are created again from the
+	# snapshot, without listing this directory.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param state Snapshot state taken by saveSnapshot.
+	# \return Boolean. True if kids were created.
+	def _restoreSnapshot(self, state):
+		if state[0] != "dir":
+			return False
+		(kind, stat, dirNameList, fileStateList) = state
+		if self._getDiskStat() != stat:
+			return False
+		self.__srcStat = self._getDiskStat()
+		listing  = {}
+		fileList = []
+		for (fileName, fileKind, fileStat) in fileStateList:
+			# Files changed since are sniffed again
+			diskStat = BaseFileObj._statKey(self.path+"/"+fileName)
+			if fileStat is None or diskStat != fileStat:
+				fileKind = None
+			listing[fileName] = diskStat
+			fileList.append((fileName, fileKind))
+		self.__createKids(listing, dirNameList, fileList)
+		return True
+
+	## Saves a snapshot of this directory and everything it contains that was
+	# read, so it can be restored from it by DirFileObj(snapshot=...).
+	#
+	# Only contents that are the same as on disk are saved, together with
+	# their stat (inode, modification time and size). Files modified just before
+	# the snapshot is taken are left out, as they may still change without
+	# changing their stat.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param snapshot String with path of snapshot file
+	def saveSnapshot(self, snapshot):
+		# Validate input type
+		if not isinstance(snapshot, str):
+			raise TypeError("Parameter snapshot must be a string")
+		racyNs = time.time_ns() - _SNAPSHOT_RACY_NS
+		rootLen = len(self.path) + 1
+		stateDict = {}
+		dirStack = [self]
+		while dirStack:
+			dirObj = dirStack.pop()
+			if not dirObj.isLoaded():
+				continue
+			fileStateList = []
+			for (fileName, fileObj) in dirObj.__fileDict.items():
+				state = fileObj._takeSnapshot() if fileObj.isLoaded() else None
+				if state is not None and state[1][1] < racyNs:
+					stateDict[fileObj.path[rootLen:]] = state
+					fileStateList.append((fileName, state[0], state[1]))
+				else:
+					fileStateList.append((fileName, None, None))
+			stat = dirObj.__srcStat
+			if not dirObj.isModified() and stat is not None and stat[1] < racyNs and BaseFileObj._statKey(dirObj.path) == stat:
+				stateDict[dirObj.path[rootLen:]] = ("dir", stat, list(dirObj.__dirDict.keys()), fileStateList)
+			dirStack.extend(dirObj.__dirDict.values())
+		# Replace snapshot at once, so it is never seen half written
+		(fd, tmpPath) = tempfile.mkstemp(prefix=".snapshot.", dir=os.path.dirname(os.path.abspath(snapshot)))
+		try:
+			with open(fd, "wb") as file:
+				_writeSnapshot(file, self.path, stateDict)
+			os.replace(tmpPath, snapshot)
+		except BaseException:
+			os.remove(tmpPath)
+			raise
+
+	## Protected _refreshFile method. Compares kids with entries on disk, adding
+	# new ones, removing the ones that are gone and refreshing the others.
+	# Subdirectories are refreshed one at a time, from a stack, so trees of any
+	# depth are refreshed without recursion.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param stat Tuple with inode, modification time and size of directory on
+	#             disk, or None if it does not exist.
+	# \param conflictList List where paths of conflicts are added.
+	# \return Boolean. False if directory was removed from disk and can be
+	#         removed from its father, as it has no unsaved edits.
+	def _refreshFile(self, stat, conflictList):
+		(keep, diskDicts) = self.__refreshDir(stat, conflictList)
+		# Directories listed, whose kids are not refreshed yet
+		dirStack = [] if diskDicts is None else [(self, stat, diskDicts)]
+		while dirStack:
+			(dirObj, dirStat, diskDicts) = dirStack.pop()
+			dirObj.__refreshKids(dirStat, diskDicts, conflictList, dirStack)
+		return keep
+
+	## Private __refreshDir method. Refreshes this directory, listing its
+	# entries on disk if its kids must be refreshed.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param stat Tuple with inode, modification time and size of directory on
+	#             disk, or None if it does not exist.
+	# \param conflictList List where paths of conflicts are added.
+	# \return Tuple with Boolean, False if directory can be removed from its
+	#         father, and tuple with dictionaries of stats of files and of
+	#         directories on disk, by name, or None if kids are not refreshed.
+	def __refreshDir(self, stat, conflictList):
+		# Nothing to compare if it is gone or was not listed yet
+		if stat is None or not self.isLoaded():
+			return (super(DirFileObj, self)._refreshFile(stat, conflictList), None)
+		# New directory, that was never on disk, found on disk
+		if self.isModified() and not self._isChangedOnDisk(None):
+			conflictList.append(self.path)
+			return (True, None)
+		# List entries on disk. Directory may be gone since it was stat.
+		diskDirDict  = {}
+		diskFileDict = {}
+		try:
+			entryIter = os.scandir(self.path)
+		except FileNotFoundError:
+			return (super(DirFileObj, self)._refreshFile(None, conflictList), None)
+		with entryIter:
+			for entry in entryIter:
+				# Entries that cannot be stat are listed, but not refreshed
+				try:
+					entryStat = entry.stat()
+					entryStat = (entryStat.st_ino, entryStat.st_mtime_ns, entryStat.st_size)
+				except OSError:
+					entryStat = None
+				if entryStat is not None and entry.is_dir():
+					diskDirDict[entry.name] = entryStat
+				else:
+					diskFileDict[entry.name] = entryStat
+		return (True, (diskFileDict, diskDirDict))
+
+	## Private __refreshKids method. Refreshes kids of this directory from its
+	# entries on disk. Subdirectories that are listed are added to dirStack, so
+	# their kids are refreshed next.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param stat Tuple with inode, modification time and size of directory on disk.
+	# \param diskDicts Tuple with dictionaries of stats of files and of
+	#                  directories on disk, by name, taken by __refreshDir.
+	# \param conflictList List where paths of conflicts are added.
+	# \param dirStack List of directories whose kids were not refreshed yet.
+	def __refreshKids(self, stat, diskDicts, conflictList, dirStack):
+		(diskFileDict, diskDirDict) = diskDicts
+		# Refresh kids, removing the ones that are gone
+		for (kidDict, diskDict) in [(self.__fileDict, diskFileDict), (self.__dirDict, diskDirDict)]:
+			for (kidName, kid) in list(kidDict.items()):
+				kidStat = diskDict.get(kidName)
+				if kidStat is None and kidName in diskDict:
+					continue
+				if kidDict is self.__dirDict:
+					(keep, kidDiskDicts) = kid.__refreshDir(kidStat, conflictList)
+					if kidDiskDicts is not None:
+						dirStack.append((kid, kidStat, kidDiskDicts))
+				else:
+					# Files that changed kind are created again
+					if kidStat is not None and kid.isLoaded() and not kid.isModified() and \
+					   kid._isChangedOnDisk(kidStat) and \
+					   isinstance(kid, BinaryFileObj) != BinaryFileObj.isBinaryFile(kid.path):
+						kidStat = None
+					keep = kid._refreshFile(kidStat, conflictList)
+				if not keep:
+					del kidDict[kidName]
+					self.__discardUnsniffed(kidName)
+					if self.__isIndexed():
+						self.__unindexTree(kid)
+					self._resetHash()
+		# Add new kids, unless an edited kid of another kind has their name. New
+		# files are read at once unless directory is lazy, so their kind is
+		# checked now.
+		listing = dict(diskFileDict)
+		listing.update(diskDirDict)
+		self.__createKids(listing,
+			[dirName for dirName in diskDirDict if dirName not in self.__dirDict and dirName not in self.__fileDict],
+			[(fileName, None if self.isLazy() else self.__sniffKind(fileName))
+			 for fileName in diskFileDict if fileName not in self.__fileDict and fileName not in self.__dirDict])
+		# Kids are in sync with disk as it was listed, so snapshots can save it
+		self._setDiskStat(stat)
+		self.__srcStat = stat
+
+	## Protected _loadAll method. Reads this directory and everything it contains.
+	#
+	# \param  self Instance of DirFileObj class.
+	def _loadAll(self):
+		# Read concurrently if there is an executor
+		if self.__executor is not None:
+			self.__loadAllConcurrent()
+			return
+		# Each directory is listed when walked, then all files it contains are read
+		for (relPath, dirObj, dirNameList, fileNameList) in self.__walkDirs(True):
+			dirObj.__sniffFiles()
+			for fileObj in list(dirObj.__fileDict.values()):
+				fileObj._loadAll()
+
+	## Private __loadAllConcurrent method. Reads this directory and everything
+	# it contains using its executor.
+	#
+	# Each directory lists its own contents in a single task, so kids are added
+	# in the same order as in a sequential read. As soon as a directory is
+	# listed, reading its kids is submitted. Directories that were already
+	# listed, as in lazy trees, are walked all the same. Files whose kind was
+	# not checked yet are checked in a task, and read once they are replaced
+	# if needed.
+	#
+	# \param  self Instance of DirFileObj class.
+	def __loadAllConcurrent(self):
+		with _executorContext(self.__executor) as executor:
+			# Pending tasks, with the directory read, a tuple with directory and
+			# name of file checked, or None for files read
+			pending  = {}
+			dirStack = [self]
+			while dirStack or pending:
+				# Walk listed directories, even if they were listed before, and
+				# submit reading whatever was not read yet
+				while dirStack:
+					dirObj = dirStack.pop()
+					if not dirObj.isLoaded():
+						pending[executor.submit(dirObj._load)] = dirObj
+						continue
+					unsniffed = dirObj.__unsniffed or ()
+					for (fileName, fileObj) in list(dirObj.__fileDict.items()):
+						if fileObj.isLoaded():
+							continue
+						if fileName in unsniffed:
+							pending[executor.submit(BinaryFileObj.isBinaryFile, fileObj.path)] = (dirObj, fileName)
+						else:
+							pending[executor.submit(fileObj._load)] = None
+					dirStack.extend(reversed(list(dirObj.__dirDict.values())))
+				if not pending:
+					break
+				done, _ = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					task = pending.pop(future)
+					# Raise any error found while reading
+					result = future.result()
+					if isinstance(task, tuple):
+						# Files are only replaced here, so kids are never added concurrently
+						fileObj = task[0].__sniffFile(task[1], result)
+						if not fileObj.isLoaded():
+							pending[executor.submit(fileObj._load)] = None
+					elif task is not None:
+						dirStack.append(task)
+
+	## Protected _aloadAll coroutine. Reads this directory and everything it
+	# contains, listing each directory in a single task. As soon as a directory
+	# is listed, reading its kids is submitted.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param semaphore asyncio.Semaphore limiting concurrent reads.
+	async def _aloadAll(self, semaphore):
+		loop = asyncio.get_event_loop()
+		async def load(fileObj):
+			async with semaphore:
+				await loop.run_in_executor(None, fileObj._load)
+		async def sniff(path):
+			async with semaphore:
+				return await loop.run_in_executor(None, BinaryFileObj.isBinaryFile, path)
+		# Pending tasks, with their object, if it is a directory and the name of
+		# the file checked, for tasks checking the kind of a file of a directory
+		pending = {asyncio.ensure_future(load(self)): (self, True, None)}
+		try:
+			while pending:
+				done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+				for task in done:
+					(fileObj, isDir, fileName) = pending.pop(task)
+					# Raise any error found while reading
+					result = task.result()
+					# Read checked files once they are replaced if needed
+					if fileName is not None:
+						kid = fileObj.__sniffFile(fileName, result)
+						if not kid.isLoaded() or kid.isLazy():
+							pending[asyncio.ensure_future(load(kid))] = (kid, False, None)
+						continue
+					fileObj._setLazy(False)
+					# Submit reading all kids of listed directories
+					if isDir:
+						unsniffed = fileObj.__unsniffed or ()
+						for (kidDict, isKidDir) in [(fileObj.__fileDict, False), (fileObj.__dirDict, True)]:
+							for (kidName, kid) in list(kidDict.items()):
+								if not isKidDir and kidName in unsniffed and not kid.isLoaded():
+									pending[asyncio.ensure_future(sniff(kid.path))] = (fileObj, False, kidName)
+								elif not kid.isLoaded() or kid.isLazy():
+									pending[asyncio.ensure_future(load(kid))] = (kid, isKidDir, None)
+		finally:
+			# Stop reading after an error
+			for task in pending:
+				task.cancel()
+
+	## Private _copyFile method. Copies everything this directory contains, one
+	# directory at a time, so deep trees are copied without recursion.
+	#
+	# \param  self Instance of DirFileObj class.
 	def _copyFile(self):
+		dirStack = [self]
+		while dirStack:
+			dirObj = dirStack.pop()
+			if dirObj is self:
+				dirObj.__copyKids(dirStack)
+			else:
+				dirObj._timeOp("copy", functools.partial(dirObj.__copyKids, dirStack))
+
+	## Private __copyKids method. Copies the kids of the original directory,
+	# that this copy still shares, to this copy. Directories that are copied
+	# are added to dirStack, so their kids are copied next.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param dirStack List of copied directories whose kids were not copied yet.
+	def __copyKids(self, dirStack):
 		# Copy old dictionaries
 		oldFileDict = self.__fileDict
 		oldDirDict = self.__dirDict
-		# Initialize new dictionaries
-		self.__fileDict = {}
-		self.__dirDict = {}
-		# Copies all files it contains
-		for fileName in oldFileDict.keys():
-			self.__fileDict[fileName]=oldFileDict[fileName].copy(name=fileName, father=self)
+		# Initialize new dictionaries. Index of original is not shared either.
+		self.__fileDict = _EMPTY_DICT
+		self.__dirDict = _EMPTY_DICT
+		self.__pathIndex = _EMPTY_DICT
+		self.__nameIndex = _EMPTY_DICT
+		self.__extIndex  = _EMPTY_DICT
+		self.__snapshot  = None
+		self.__srcStat   = None
+		self.__unsniffed = None
+		# Copies all files it contains, that are added to this copy by _isNewFather
+		for (fileName, fileObj) in list(oldFileDict.items()):
+			fileCopy = fileObj._copyNode(fileName, self)
+			fileCopy._timeOp("copy", fileCopy._copyFile)
 		# Copies all dirs it contains
-		for dirName in oldDirDict.keys():
-			self.__dirDict[dirName]=oldDirDict[dirName].copy(name=dirName, father=self)
+		for (dirName, dirObj) in list(oldDirDict.items()):
+			dirStack.append(dirObj._copyNode(dirName, self))
+
+	## Substitutes many strings in all text files this directory contains,
+	# recursively, in a single pass over the contents of each file. See
+	# TextFileObj.strSubMany.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param mapping Dictionary with strings to be replaced as keys, and strings
+	#                used in replacement as values.
+	def strSubMany(self, mapping):
+		# Compile mapping once for all files
+		regexp = TextFileObj._compileStrMap(mapping)
+		if regexp is None:
+			return
+		# Files in stream mode only need to look as far ahead as the longest string
+		repl = functools.partial(_strMapRepl, mapping)
+		maxLen = max(map(len, mapping))
+		for fileObj in self.__iterAllFiles():
+			if not isinstance(fileObj, BinaryFileObj):
+				fileObj._regexpSub(regexp, repl, maxLen)
+
+	## Substitutes a regexp in all text files this directory contains,
+	# recursively. See TextFileObj.regexSub.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param pattern String or compiled regexp to be replaced.
+	# \param repl String or function used in replacement, as in re.sub.
+	# \param flags Optional integer with re flags, only for string patterns.
+	def regexSub(self, pattern, repl, flags=0):
+		# Compile pattern once for all files
+		regexp = TextFileObj._compileRegexp(pattern, repl, flags)
+		for fileObj in self.__iterAllFiles():
+			if not isinstance(fileObj, BinaryFileObj):
+				fileObj._regexpSub(regexp, repl)
+
+	## Applies edits to all text files this directory contains, recursively,
+	# in other processes. Contents of files are sent to the executor in batches
+	# of similar total size, and new contents are sent back.
+	#
+	# Edits are tuples with the name and parameters of a substitution method
+	# of TextFileObj, applied in order: ("strSub", findStr, replaceStr),
+	# ("strSubMany", mapping) and ("regexSub", pattern, repl[, flags]).
+	# Functions used as repl must be picklable (e.g. defined in a module).
+	# Files in stream mode record edits without sending their contents.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param editList List of tuples with edits.
+	# \param executor Optional concurrent.futures.Executor or integer with number
+	#                 of worker processes. Defaults to a process pool with one
+	#                 worker per CPU.
+	# \param batchesPerWorker Optional integer with number of batches sent to each
+	#                         worker, so they finish at about the same time.
+	def transform(self, editList, executor=None, batchesPerWorker=4):
+		# Validate input types
+		_checkExecutor(executor)
+		_checkLimit(batchesPerWorker)
+		editList = DirFileObj.__compileEdits(editList)
+		# Nothing to read when there are no edits
+		if not editList:
+			return
+		if executor is None:
+			executor = os.cpu_count() or 1
+		# Gather contents of text files
+		fileList = []
+		textList = []
+		for fileObj in self.__iterAllFiles():
+			if isinstance(fileObj, BinaryFileObj):
+				continue
+			if fileObj.isStream():
+				DirFileObj.__transformFile(fileObj, editList)
+				continue
+			fileList.append(fileObj)
+			textList.append(fileObj.getStr())
+		if not textList:
+			return
+		# Apply edits to batches of similar size
+		workerCount = executor if isinstance(executor, int) else (os.cpu_count() or 1)
+		batchList = _balanceBatches([len(text) for text in textList], workerCount * batchesPerWorker)
+		with _executorContext(executor, ProcessPoolExecutor) as pool:
+			futureDict = {}
+			for idxList in batchList:
+				future = pool.submit(_transformBatch, editList, [textList[idx] for idx in idxList])
+				futureDict[future] = idxList
+			# Merge results back
+			for future in futureDict:
+				for (idx, newText) in zip(futureDict[future], future.result()):
+					if newText is not None:
+						fileList[idx]._setStr(newText)
+
+	## Private __compileEdits method. Validates and compiles edits of transform.
+	#
+	# \param editList List of tuples with edits.
+	# \return List of tuples ("strSub", findStr, replaceStr) or ("regexp",
+	#         regexp, repl, maxLen).
+	@staticmethod
+	def __compileEdits(editList):
+		if not isinstance(editList, (list, tuple)):
+			raise TypeError("Parameter editList must be a list of tuples")
+		compiledList = []
+		for edit in editList:
+			if not isinstance(edit, tuple) or not edit:
+				raise TypeError("Parameter editList must be a list of tuples")
+			(name, paramList) = (edit[0], edit[1:])
+			if name == "strSub" and len(paramList) == 2:
+				(findStr, replaceStr) = paramList
+				if not isinstance(findStr, str):
+					raise TypeError("Parameter findStr must be a string")
+				if not isinstance(replaceStr, str):
+					raise TypeError("Parameter replaceStr must be a string")
+				compiledList.append(("strSub", findStr, replaceStr))
+			elif name == "strSubMany" and len(paramList) == 1:
+				(mapping,) = paramList
+				regexp = TextFileObj._compileStrMap(mapping)
+				if regexp is not None:
+					compiledList.append(("regexp", regexp, functools.partial(_strMapRepl, dict(mapping)), max(len(findStr) for findStr in mapping)))
+			elif name == "regexSub" and len(paramList) in (2, 3):
+				(pattern, repl) = paramList[:2]
+				regexp = TextFileObj._compileRegexp(pattern, repl, paramList[2] if len(paramList) == 3 else 0)
+				compiledList.append(("regexp", regexp, repl, None))
+			else:
+				raise ValueError("Invalid edit %s" % repr(edit))
+		return compiledList
+
+	## Private __transformFile method. Applies compiled edits to a file in this process.
+	#
+	# \param fileObj TextFileObj
+	# \param editList List of edits, as compiled by __compileEdits
+	@staticmethod
+	def __transformFile(fileObj, editList):
+		for edit in editList:
+			if edit[0] == "strSub":
+				fileObj.strSub(edit[1], edit[2])
+			else:
+				fileObj._regexpSub(edit[1], edit[2], edit[3])
+
+	## Private __iterAllFiles method. Iterates through all files this directory
+	# contains, recursively.
+	#
+	# \param  self Instance of DirFileObj class.
+	# \return Generator of TextFileObj and BinaryFileObj.
+	def __iterAllFiles(self):
+		for (relPath, dirObj, dirNameList, fileNameList) in self.__walkDirs(True):
+			dirObj.__sniffFiles()
+			yield from list(dirObj.__fileDict.values())
+
+	## Walks through this directory and all directories it contains, like
+	# os.walk. Each directory is listed when it is reached, but files are not
+	# read. Walking uses an explicit stack, so trees of any depth can be walked.
+	#
+	# When walking top-down, names can be removed from the list of directories
+	# to skip them.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param topdown Optional Boolean. If True, each directory is yielded before
+	#                the directories it contains, otherwise after them.
+	# \return Generator of tuples with path relative to this directory ("" for
+	#         itself), list of names of its directories and list of names of
+	#         its files.
+	def walk(self, topdown=True):
+		# Validate input type
+		if not isinstance(topdown, bool):
+			raise TypeError("Parameter topdown must be a boolean")
+		for (relPath, dirObj, dirNameList, fileNameList) in self.__walkDirs(topdown):
+			yield (relPath, dirNameList, fileNameList)
+
+	## Private __walkDirs method. Walks through directories, like walk, also
+	# yielding each DirFileObj.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param topdown Boolean. If True, directories are yielded top-down.
+	# \return Generator of tuples with relative path, DirFileObj, list of names
+	#         of its directories and list of names of its files.
+	def __walkDirs(self, topdown):
+		# Directories to walk, with their relative path, and the names of their
+		# kids once they were walked into, to be yielded bottom-up
+		dirStack = [(self, "", None)]
+		while dirStack:
+			(dirObj, relPath, nameLists) = dirStack.pop()
+			if nameLists is not None:
+				yield (relPath, dirObj) + nameLists
+				continue
+			dirObj._load()
+			dirNameList  = list(dirObj.__dirDict)
+			fileNameList = list(dirObj.__fileDict)
+			if topdown:
+				yield (relPath, dirObj, dirNameList, fileNameList)
+			else:
+				dirStack.append((dirObj, relPath, (dirNameList, fileNameList)))
+			prefix = relPath + "/" if relPath else ""
+			for dirName in reversed(dirNameList):
+				kid = dirObj.__dirDict.get(dirName)
+				if kid is not None:
+					dirStack.append((kid, prefix + dirName, None))
+
+	## Protected _hashFile method. Combines names and hashes of kids.
+	#
+	# Subdirectories without hash are hashed first, bottom-up, so hashes of
+	# kids are always known and trees of any depth are hashed without recursion.
+	#
+	# \param  self Instance of DirFileObj class.
+	# \return Bytes with digest.
+	def _hashFile(self):
+		dirList = []
+		for (relPath, dirObj, dirNameList, fileNameList) in self.__walkDirs(True):
+			dirList.append(dirObj)
+			dirNameList[:] = [dirName for dirName in dirNameList if not dirObj.__dirDict[dirName]._isHashed()]
+		for dirObj in reversed(dirList[1:]):
+			dirObj.getHash()
+		self.__sniffFiles()
+		digest = self._newDigest()
+		for (kind, kidDict) in [(b"d", self.__dirDict), (b"f", self.__fileDict)]:
+			for kidName in sorted(kidDict):
+				digest.update(kind + kidName.encode("utf-8", "surrogateescape") + b"\0")
+				digest.update(kidDict[kidName].getHash())
+		return digest.digest()
+
+	## Compares this directory with another one. Subdirectories with the same
+	# hash are skipped without comparing what they contain.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param other DirFileObj to compare with
+	# \return List of Strings with paths, relative to this directory, of
+	#         directories and files that are only in one of them or have
+	#         different contents, sorted.
+	def diff(self, other):
+		# Validate input type
+		if not isinstance(other, DirFileObj):
+			raise TypeError("Parameter other must be a DirFileObj")
+		diffList = []
+		dirStack = [(self, other, "")]
+		while dirStack:
+			(dir0, dir1, relPath) = dirStack.pop()
+			if dir0.getHash() == dir1.getHash():
+				continue
+			for kidName in set(dir0.__dirDict) | set(dir0.__fileDict) | set(dir1.__dirDict) | set(dir1.__fileDict):
+				kidPath = relPath + kidName
+				if kidName in dir0.__dirDict and kidName in dir1.__dirDict:
+					dirStack.append((dir0.__dirDict[kidName], dir1.__dirDict[kidName], kidPath + "/"))
+				elif kidName in dir0.__fileDict and kidName in dir1.__fileDict:
+					if dir0.__fileDict[kidName].getHash() != dir1.__fileDict[kidName].getHash():
+						diffList.append(kidPath)
+				else:
+					# Only in one of them, or a directory in one and a file in the other
+					diffList.append(kidPath)
+		return sorted(diffList)
 
 	## Gets a list of directories contained in this directory.
 	#
 	# \param  self Instance of DirFileObj class.
 	def getDirList(self):
+		self._load()
 		return list(self.__dirDict.keys())
 
+	## Gets a view of the names of directories contained in this directory.
+	# View is not a copy, so it follows later changes to this directory.
+	#
+	# \param  self Instance of DirFileObj class.
+	# \return Dictionary keys view.
+	def getDirView(self):
+		self._load()
+		# View must follow the dictionary kids are added to
+		if self.__dirDict is _EMPTY_DICT:
+			self.__dirDict = {}
+		return self.__dirDict.keys()
+
 	## Gets a directory contained in this directory.
 	#
 	# \param self Instance of DirFileObj class.
@@ -131,7 +1376,8 @@ class DirFileObj(BaseFileObj):
 		if not isinstance(dirName, str):
 			raise TypeError("Parameter dirName must be a string")
 		# Look for dir
-		if dirName in self.getDirList():
+		self._load()
+		if dirName in self.__dirDict:
 			return self.__dirDict[dirName]
 		else:
 			raise ValueError("Could not find directory %s" % dirName)
@@ -140,19 +1386,198 @@ class DirFileObj(BaseFileObj):
 	#
 	# \param  self Instance of DirFileObj class.
 	def getFileList(self):
+		self._load()
 		return list(self.__fileDict.keys())
 
+	## Gets a view of the names of files contained in this directory.
+	# View is not a copy, so it follows later changes to this directory.
+	#
+	# \param  self Instance of DirFileObj class.
+	# \return Dictionary keys view.
+	def getFileView(self):
+		self._load()
+		# View must follow the dictionary kids are added to
+		if self.__fileDict is _EMPTY_DICT:
+			self.__fileDict = {}
+		return self.__fileDict.keys()
+
 	## Gets a file contained in this directory.
 	#
 	# \param self Instance of DirFileObj class.
 	# \param fileName String with name of file to look for
-	# \return TextFileObj
+	# \return TextFileObj or BinaryFileObj
 	def getFile(self, fileName):
 		# Validate input type
 		if not isinstance(fileName, str):
 			raise TypeError("Parameter fileName must be a string")
 		# Look for dir
-		if fileName in self.getFileList():
-			return self.__fileDict[fileName]
+		self._load()
+		if fileName in self.__fileDict:
+			return self.__sniffFile(fileName)
 		else:
 			raise ValueError("Could not find file %s" % fileName)
+
+	## Removes a directory contained in this directory. Directory is only
+	# removed from disk on next write.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param dirName String with name of dir to remove
+	def removeDir(self, dirName):
+		# Validate input type
+		if not isinstance(dirName, str):
+			raise TypeError("Parameter dirName must be a string")
+		# Look for dir
+		self._load()
+		if dirName in self.__dirDict:
+			kid = self.__dirDict.pop(dirName)
+			if self.__isIndexed():
+				self.__unindexTree(kid)
+			self._setModified()
+		else:
+			raise ValueError("Could not find directory %s" % dirName)
+
+	## Removes a file contained in this directory. File is only removed from
+	# disk on next write.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param fileName String with name of file to remove
+	def removeFile(self, fileName):
+		# Validate input type
+		if not isinstance(fileName, str):
+			raise TypeError("Parameter fileName must be a string")
+		# Look for file
+		self._load()
+		if fileName in self.__fileDict:
+			kid = self.__fileDict.pop(fileName)
+			self.__discardUnsniffed(fileName)
+			if self.__isIndexed():
+				self.__unindexTree(kid)
+			self._setModified()
+		else:
+			raise ValueError("Could not find file %s" % fileName)
+
+	## Finds a directory or file from its path relative to this directory.
+	#
+	# Loaded objects are found in the index of root. Otherwise, path is followed
+	# from this directory, listing lazy directories on the way.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param relPath String with relative path (e.g. "a/b/c.txt")
+	# \return DirFileObj or TextFileObj
+	def find(self, relPath):
+		# Validate input type
+		if not isinstance(relPath, str):
+			raise TypeError("Parameter relPath must be a string")
+		nameList = [name for name in relPath.split("/") if name not in ("", ".")]
+		if not nameList:
+			raise ValueError("Could not find path %s" % relPath)
+		# Look for it in index
+		if self.__isIndexed():
+			fileObj = self.root.__pathIndex.get("/".join(self.__getRelNameList() + nameList))
+			if fileObj is not None:
+				return DirFileObj.__sniffObj(fileObj)
+		# Follow path otherwise
+		dirObj = self
+		for name in nameList[:-1]:
+			dirObj._load()
+			dirObj = dirObj.__dirDict.get(name)
+			if dirObj is None:
+				raise ValueError("Could not find path %s" % relPath)
+		dirObj._load()
+		fileObj = dirObj.__dirDict.get(nameList[-1], dirObj.__fileDict.get(nameList[-1]))
+		if fileObj is None:
+			raise ValueError("Could not find path %s" % relPath)
+		return DirFileObj.__sniffObj(fileObj)
+
+	## Finds all directories and files matching a glob pattern relative to this
+	# directory (e.g. "**/*.cfg"). Wildcards do not match /, and a ** component
+	# matches any number of directories.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param pattern String with glob pattern
+	# \return List of DirFileObj and TextFileObj, sorted by path.
+	def glob(self, pattern):
+		# Validate input type
+		if not isinstance(pattern, str):
+			raise TypeError("Parameter pattern must be a string")
+		regexp = _globRegexp(pattern)
+		# Only look at the bucket of a name or extension, when pattern has one
+		name = pattern.rstrip("/").split("/")[-1]
+		if name != "**" and not re.search("[*?[]", name):
+			return self.findByName(name, regexp)
+		if re.match("[*][^*?[]*[.][^*?[.]*$", name):
+			return self.findByExt(_getExt(name), regexp)
+		return self.__query("path", None, regexp)
+
+	## Finds all directories and files with a given name in this directory,
+	# recursively.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param name String with name
+	# \param regexp Optional compiled regexp that relative paths must match
+	# \return List of DirFileObj and TextFileObj, sorted by path.
+	def findByName(self, name, regexp=None):
+		# Validate input type
+		if not isinstance(name, str):
+			raise TypeError("Parameter name must be a string")
+		return self.__query("name", name, regexp)
+
+	## Finds all directories and files with a given extension in this directory,
+	# recursively.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param ext String with extension, including the dot (e.g. ".cfg")
+	# \param regexp Optional compiled regexp that relative paths must match
+	# \return List of DirFileObj and TextFileObj, sorted by path.
+	def findByExt(self, ext, regexp=None):
+		# Validate input type
+		if not isinstance(ext, str):
+			raise TypeError("Parameter ext must be a string")
+		return self.__query("ext", ext, regexp)
+
+	## Private __query method. Gets all objects this directory contains from a
+	# bucket of an index.
+	#
+	# \param self Instance of DirFileObj class.
+	# \param indexName String with "path", "name" or "ext"
+	# \param key Key of bucket in index, unused for "path"
+	# \param regexp Compiled regexp that relative paths must match, or None
+	# \return List of DirFileObj and TextFileObj, sorted by path.
+	def __query(self, indexName, key, regexp):
+		# Every directory must be listed to be indexed, but files are not read
+		for dirTuple in self.__walkDirs(True):
+			pass
+		if self.__isIndexed():
+			root = self.root
+			prefix = "/".join(self.__getRelNameList() + [""])
+		else:
+			# Directories that were removed from their root index their own contents
+			root = self
+			prefix = ""
+			self.__pathIndex = {}
+			self.__nameIndex = {}
+			self.__extIndex  = {}
+			for kid in list(self.__fileDict.values()) + list(self.__dirDict.values()):
+				self.__indexTree(kid, root=self)
+		if indexName == "path":
+			bucket = root.__pathIndex
+		elif indexName == "name":
+			bucket = root.__nameIndex.get(key, {})
+		else:
+			bucket = root.__extIndex.get(key, {})
+		resultList = []
+		for relPath in sorted(bucket):
+			if not relPath.startswith(prefix):
+				continue
+			if regexp is None or regexp.fullmatch(relPath[len(prefix):]):
+				resultList.append(DirFileObj.__sniffObj(bucket[relPath]))
+		return resultList
+
+	## Private __getRelNameList method. Gets the names of directories from root
+	# to this directory.
+	#
+	# \param  self Instance of DirFileObj class.
+	# \return List of strings.
+	def __getRelNameList(self):
+		relPath = self.path[len(self.root.path)+1:]
+		return relPath.split("/") if relPath else []
@@ -0,0 +1,244 @@
+## \file FileMetrics.py
+#  \brief Collects metrics of reads, writes and copies of files
+#
+# While a FileMetrics is enabled, every read, write and copy of a file or
+# directory is timed and counted, by operation: "readFile", "writeFile",
+# "copyFile", "readDir", "writeDir" and "copyDir". Bytes are counted for
+# reads and writes of files. When no FileMetrics is enabled, operations are
+# not timed at all.
+#
+# Times are exclusive: a directory read does not include the time spent
+# reading the kids created while listing it, so times of all operations add
+# up to the time spent in them.
+#
+#   with FileMetrics() as metrics:
+#       DirFileObj(path="tree").copy(name="copy", father=outDir).write()
+#   print(metrics.getTime("writeFile"), metrics.getSlowest())
+#
+# Revision | Author            | Date     | Comment
+#:---------|:------------------|:---------|:------------------------------------
+# 1.0      | pytomation team   | 10/18/26 | Initial version
+#
+
+import time
+import heapq
+import threading
+from pytomation.fileTypes.BaseFileObj import BaseFileObj
+
+class _Span(object):
+
+	__slots__ = ("metrics", "operation", "path", "size", "start", "childTime")
+
+	## Constructor
+	#
+	# \param self Instance of _Span class.
+	# \param metrics FileMetrics where span is recorded
+	# \param operation String with name of operation
+	# \param path String with path operation is applied to
+	def __init__(self, metrics, operation, path):
+		self.metrics   = metrics
+		self.operation = operation
+		self.path      = path
+		## Number of bytes read or written, set by caller if known
+		self.size      = None
+		self.start     = 0.0
+		self.childTime = 0.0
+
+	def __enter__(self):
+		self.metrics._pushSpan(self)
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		elapsed = time.perf_counter() - self.start
+		self.metrics._popSpan(self, elapsed)
+		return False
+
+class FileMetrics(object):
+
+	## Constructor
+	#
+	# \param self Instance of FileMetrics class.
+	# \param slowestCount Optional integer with number of slowest operations kept
+	# \param callback Optional function called after each operation with its
+	#                 name, path, exclusive time in seconds and size in bytes
+	#                 (None if unknown). It may be called from many threads.
+	def __init__(self, slowestCount=10, callback=None):
+		# Validate input types
+		if isinstance(slowestCount, bool) or not isinstance(slowestCount, int):
+			raise TypeError("Parameter slowestCount must be an integer")
+		if slowestCount < 0:
+			raise ValueError("Parameter slowestCount cannot be negative")
+		if callback is not None and not callable(callback):
+			raise TypeError("Parameter callback must be callable")
+		self.__slowestCount = slowestCount
+		self.__callback     = callback
+		self.__lock         = threading.Lock()
+		# Stack of open spans of each thread
+		self.__local        = threading.local()
+		# Metrics enabled before this one, restored when it is disabled
+		self.__prevList     = []
+		self.reset()
+
+	## Clears all metrics.
+	#
+	# \param self Instance of FileMetrics class.
+	def reset(self):
+		with self.__lock:
+			self.__countDict = {}
+			self.__bytesDict = {}
+			self.__timeDict  = {}
+			# Min heap with slowest operations, as (seconds, operation, path)
+			self.__slowest   = []
+
+	## Enables metrics, so operations of all files are recorded here.
+	#
+	# \param self Instance of FileMetrics class.
+	def enable(self):
+		self.__prevList.append(BaseFileObj.setMetrics(self))
+
+	## Disables metrics, enabling back the ones enabled before.
+	#
+	# \param self Instance of FileMetrics class.
+	def disable(self):
+		if not self.__prevList:
+			raise RuntimeError("FileMetrics was not enabled")
+		BaseFileObj.setMetrics(self.__prevList.pop())
+
+	def __enter__(self):
+		self.enable()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.disable()
+		return False
+
+	## Times a span of code. Spans are recorded as any other operation, so
+	# they can be used to time steps of user code.
+	#
+	#   with metrics.span("render", path) as span:
+	#       ...
+	#       span.size = len(data)
+	#
+	# \param self Instance of FileMetrics class.
+	# \param operation String with name of operation
+	# \param path Optional String with path operation is applied to
+	# \return Context manager timing its block.
+	def span(self, operation, path=""):
+		# Validate input types
+		if not isinstance(operation, str):
+			raise TypeError("Parameter operation must be a string")
+		if not isinstance(path, str):
+			raise TypeError("Parameter path must be a string")
+		return _Span(self, operation, path)
+
+	## Protected _pushSpan method. Opens a span in current thread.
+	#
+	# \param self Instance of FileMetrics class.
+	# \param span _Span being opened.
+	def _pushSpan(self, span):
+		try:
+			stack = self.__local.stack
+		except AttributeError:
+			stack = self.__local.stack = []
+		stack.append(span)
+
+	## Protected _popSpan method. Closes the last span of current thread and
+	# records it. Its time is excluded from the span it is nested in.
+	#
+	# \param self Instance of FileMetrics class.
+	# \param span _Span being closed.
+	# \param elapsed Float with seconds since span was opened.
+	def _popSpan(self, span, elapsed):
+		stack = self.__local.stack
+		stack.pop()
+		if stack:
+			stack[-1].childTime += elapsed
+		self.record(span.operation, span.path, elapsed - span.childTime, span.size)
+
+	## Records an operation.
+	#
+	# \param self Instance of FileMetrics class.
+	# \param operation String with name of operation
+	# \param path String with path operation was applied to
+	# \param seconds Float with time spent in operation
+	# \param size Optional integer with number of bytes read or written
+	def record(self, operation, path, seconds, size=None):
+		with self.__lock:
+			self.__countDict[operation] = self.__countDict.get(operation, 0) + 1
+			self.__timeDict[operation]  = self.__timeDict.get(operation, 0.0) + seconds
+			if size is not None:
+				self.__bytesDict[operation] = self.__bytesDict.get(operation, 0) + size
+			if self.__slowestCount > 0:
+				item = (seconds, operation, path)
+				if len(self.__slowest) < self.__slowestCount:
+					heapq.heappush(self.__slowest, item)
+				elif item > self.__slowest[0]:
+					heapq.heapreplace(self.__slowest, item)
+		if self.__callback is not None:
+			self.__callback(operation, path, seconds, size)
+
+	## Gets the number of times operations were run.
+	#
+	# \param self Instance of FileMetrics class.
+	# \param operation Optional String with name of operation. Defaults to all.
+	# \return Integer
+	def getCount(self, operation=None):
+		return self.__getTotal(self.__countDict, operation, 0)
+
+	## Gets the number of bytes read or written by operations.
+	#
+	# \param self Instance of FileMetrics class.
+	# \param operation Optional String with name of operation. Defaults to all.
+	# \return Integer
+	def getBytes(self, operation=None):
+		return self.__getTotal(self.__bytesDict, operation, 0)
+
+	## Gets the time spent in operations.
+	#
+	# \param self Instance of FileMetrics class.
+	# \param operation Optional String with name of operation. Defaults to all.
+	# \return Float with seconds
+	def getTime(self, operation=None):
+		return self.__getTotal(self.__timeDict, operation, 0.0)
+
+	## Private __getTotal method.
+	#
+	# \param self Instance of FileMetrics class.
+	# \param metricDict Dictionary with a metric of each operation
+	# \param operation String with name of operation, or None for all
+	# \param zero Value of metric of operations that were not run
+	# \return Total of metric.
+	def __getTotal(self, metricDict, operation, zero):
+		with self.__lock:
+			if operation is None:
+				return sum(metricDict.values(), zero)
+			return metricDict.get(operation, zero)
+
+	## Gets the names of operations that were run.
+	#
+	# \param self Instance of FileMetrics class.
+	# \return List of Strings, sorted.
+	def getOperations(self):
+		with self.__lock:
+			return sorted(self.__countDict)
+
+	## Gets the slowest operations, slowest first.
+	#
+	# \param self Instance of FileMetrics class.
+	# \return List of tuples with seconds, operation and path.
+	def getSlowest(self):
+		with self.__lock:
+			return sorted(self.__slowest, reverse=True)
+
+	## Gets a summary of metrics, one line for each operation.
+	#
+	# \param self Instance of FileMetrics class.
+	# \return String
+	def getSummary(self):
+		lineList = ["%-12s %8s %14s %12s" % ("operation", "count", "bytes", "time (s)")]
+		for operation in self.getOperations():
+			lineList.append("%-12s %8d %14d %12.6f" % (operation, self.getCount(operation), self.getBytes(operation), self.getTime(operation)))
+		for (seconds, operation, path) in self.getSlowest():
+			lineList.append("slowest: %.6f s %s %s" % (seconds, operation, path))
+		return "\n".join(lineList)
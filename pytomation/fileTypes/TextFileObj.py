@@ -8,12 +8,86 @@
 # 1.0      | Matheus T. M.     | 01/12/20 | Initial version
 #
 
+import io
 import os
-import copy
+import re
+import array
+import shutil
+import tempfile
+import functools
 from pytomation.fileTypes.BaseFileObj import BaseFileObj
 
+## Gets the mode files are created with, from the umask of the process.
+#
+# \return Integer with mode
+@functools.lru_cache(maxsize=None)
+def _getNewFileMode():
+	# Umask can only be read by setting it, so it is read once
+	umask = os.umask(0o022)
+	os.umask(umask)
+	return 0o666 & ~umask
+
+## Substitution applied to a stream of text, one chunk at a time.
+#
+# Matches are assumed to be at most maxLen characters long. Text that could still
+# be part of a match with the next chunk is carried over, and the last maxLen
+# characters already emitted are kept as context for lookbehinds and anchors.
+class _StreamSub(object):
+
+	__slots__ = ("__regexp", "__repl", "__maxLen", "__context", "__carry")
+
+	## Constructor
+	#
+	# \param self Instance of _StreamSub class.
+	# \param regexp Compiled regexp.
+	# \param repl Function receiving a match and returning its replacement.
+	# \param maxLen Integer with maximum length of a match.
+	def __init__(self, regexp, repl, maxLen):
+		self.__regexp  = regexp
+		self.__repl    = repl
+		self.__maxLen  = max(maxLen, 1)
+		self.__context = ""
+		self.__carry   = ""
+
+	## Substitutes regexp in next chunk of text.
+	#
+	# \param self Instance of _StreamSub class.
+	# \param chunk String with next chunk of text.
+	# \param final Boolean. If True, chunk is the end of text.
+	# \return String with substituted text that is ready to be emitted.
+	def feed(self, chunk, final):
+		text  = self.__context + self.__carry + chunk
+		start = len(self.__context)
+		pos   = start
+		cut   = len(text) if final else max(start, len(text) - self.__maxLen + 1)
+		outList = []
+		for match in self.__regexp.finditer(text, start):
+			# Matches that could change with the next chunk are carried over
+			if not final and (match.start() + self.__maxLen > len(text) or match.end() + 2 > len(text)):
+				cut = min(cut, match.start())
+				break
+			outList.append(text[pos:match.start()])
+			outList.append(self.__repl(match))
+			pos = match.end()
+		cut = max(cut, pos)
+		outList.append(text[pos:cut])
+		self.__carry   = text[cut:]
+		self.__context = text[max(0, cut - self.__maxLen):cut]
+		return "".join(outList)
+
 class TextFileObj(BaseFileObj):
 
+	## Tuning attributes below can be set for a single object. Its __dict__ is
+	# only created when one of them is.
+	__slots__ = ("__text", "__lineOffsets", "__stream", "__srcPath", "__srcStat", "__srcExact", "__subList", "__dict__")
+
+	## Number of characters read at a time in stream mode
+	streamChunkSize = 1 << 20
+	## Maximum length of regexp matches in stream mode
+	streamWindow    = 1 << 16
+	## Number of characters written at a time, and size of write buffer
+	writeBufferSize = 1 << 20
+
 	## Constructor
 	#
 	# Create the object depending on the
@@ -22,11 +96,30 @@ class TextFileObj(BaseFileObj):
 	# \param path Optional String with path of file
 	# \param name Optional String with name of file
 	# \param father Optional BaseFileObj that is the father of this file
-	def __init__(self, path="", name="", father=None):
-		# Initializes its line list
-		self.__lineList = []
+	# \param lazy Optional Boolean. If True, lines are only read when first needed
+	# \param stream Optional Boolean. If True, contents are never held in memory.
+	#               Substitutions are recorded and applied chunk by chunk while
+	#               the file is copied to its path by write.
+	def __init__(self, path="", name="", father=None, lazy=None, stream=False):
+		# Validate input type
+		if not isinstance(stream, bool):
+			raise TypeError("Parameter stream must be a boolean")
+		# Initializes its contents, as a single string where every line ends
+		# with a line break, and offsets where each line starts, computed when
+		# first needed. Both are never changed in place, so copies of a file can
+		# share them until either one is edited.
+		self.__text        = ""
+		self.__lineOffsets = None
+		# Initializes source file, that lines were read from while they are not
+		# edited, and recorded substitutions of stream mode
+		self.__stream   = stream
+		self.__srcPath  = None
+		self.__srcStat  = None
+		self.__srcExact = False
+		# Substitutions are a tuple, so the empty one is shared by every file
+		self.__subList  = ()
 		# Calls super constructor
-		super(TextFileObj, self).__init__(path=path, name=name, father=father)
+		super(TextFileObj, self).__init__(path=path, name=name, father=father, lazy=lazy)
 
 	## Protected _isNewFather method
 	#
@@ -35,38 +128,165 @@ class TextFileObj(BaseFileObj):
 	def _isNewFather(self, kid):
 		raise RuntimeError("TextFileObj cannot be a father")
 
+	## Checks if file is in stream mode.
+	#
+	# \param  self Instance of TextFileObj class.
+	# \return Boolean.
+	def isStream(self):
+		return self.__stream
+
 	## Private _writeFile method.
 	#
 	# \param  self Instance of TextFileObj class.
 	def _writeFile(self):
 		# Check if folder exists
-		path = self.path
-		path = path.replace(self.name, "")
+		path = os.path.dirname(self.path)
 		if not os.path.exists(path):
 			raise RuntimeError("Tried to write a file in invalid location %s" % path)
-		# Create file
-		with open(self.path, "w") as file:
-			for line in self.__lineList:
-				file.write(line+"\n")
-		file.close()
+		# Make sure lines were read before overwriting the file
+		self._load()
+		# Remove a directory found in its place
+		if os.path.isdir(self.path) and not os.path.islink(self.path):
+			try:
+				shutil.rmtree(self.path)
+			except Exception as e:
+				raise RuntimeError("Error writing TextFileObj to path %s. Unexpected when removing old dir: %s" % (self.path,str(e)))
+		# Stream files are copied to a temporary file, that then replaces the file
+		if self.__stream:
+			self.__writeStream()
+			return
+		# Files that were not edited are copied from their source file, if it
+		# did not change and writing lines would give back the same bytes
+		if self.__srcPath is not None and self.__srcExact and self._statKey(self.__srcPath) == self.__srcStat:
+			if not BaseFileObj._isSameFile(self.__srcPath, self.path):
+				try:
+					BaseFileObj._copyFileData(self.__srcPath, self.path)
+				except Exception as e:
+					raise RuntimeError("Error writing TextFileObj to path %s. Unexpected when copying from %s: %s" % (self.path, self.__srcPath, str(e)))
+		else:
+			# Create file
+			with open(self.path, "w", buffering=self.writeBufferSize) as file:
+				file.writelines(self.iterChunks(self.writeBufferSize))
+		# File is now the source of its lines
+		self.__srcPath  = self.path
+		self.__srcStat  = self._statKey(self.__srcPath)
+		self.__srcExact = True
+
+	## Private __writeStream method. Writes file in stream mode, applying
+	# recorded substitutions to its source file chunk by chunk.
+	#
+	# \param  self Instance of TextFileObj class.
+	def __writeStream(self):
+		(fd, tmpPath) = tempfile.mkstemp(prefix="."+self.name+".", dir=os.path.dirname(self.path))
+		try:
+			with open(fd, "w") as file:
+				for chunk in self.__iterStream(self.streamChunkSize):
+					file.write(chunk)
+			# Temporary file is only readable by its owner, so give it the mode
+			# of the file it replaces, or the one of new files
+			try:
+				shutil.copymode(self.path, tmpPath)
+			except FileNotFoundError:
+				os.chmod(tmpPath, _getNewFileMode())
+			os.replace(tmpPath, self.path)
+		except BaseException:
+			os.remove(tmpPath)
+			raise
+		# File now holds all substitutions, so it is the new source
+		self.__srcPath = self.path
+		self.__srcStat = self._statKey(self.__srcPath)
+		self.__subList = ()
+
+	## Private __iterStream method. Reads source file in stream mode, applying
+	# recorded substitutions.
+	#
+	# \param self Instance of TextFileObj class.
+	# \param chunkSize Integer with number of characters read at a time
+	# \return Generator of strings with chunks of contents of file.
+	def __iterStream(self, chunkSize):
+		# Source file must not change after it was read
+		if self.__srcPath is not None and self._statKey(self.__srcPath) != self.__srcStat:
+			raise RuntimeError("Source file %s of %s changed since it was read" % (self.__srcPath, self.path))
+		streamSubList = [_StreamSub(*sub) for sub in self.__subList]
+		# Last character read from file and emitted by each substitution
+		lastCharList = [""] * (len(streamSubList) + 1)
+		# Files without source are empty
+		with open(self.__srcPath) if self.__srcPath is not None else io.StringIO() as file:
+			final = False
+			while not final:
+				chunk = file.read(chunkSize)
+				final = (chunk == "")
+				for (idx, streamSub) in enumerate([None] + streamSubList):
+					if streamSub is not None:
+						chunk = streamSub.feed(chunk, final)
+					if chunk:
+						lastCharList[idx] = chunk[-1]
+					# Last line break ends the last line, as lines are read back
+					# after each substitution
+					if final and lastCharList[idx] not in ("", "\n"):
+						chunk += "\n"
+						lastCharList[idx] = "\n"
+				if chunk:
+					yield chunk
 
 	## Private readFile method.
 	#
 	# \param  self Instance of TextFileObj class.
 	def _readFile(self):
-		self.__lineList = []
-		with open(self.path) as file:
-			fileLine = file.readline()
-			while fileLine:
-				self.__lineList.append(fileLine.strip("\n"))
-				fileLine = file.readline()
+		self.__srcPath = self.path
+		# Stat taken by _load is shared, instead of keeping another tuple
+		self.__srcStat = self._getDiskStat()
+		# Stream files are only read when written
+		if self.__stream:
+			return
+		# Read line breaks as they are, to know if writing contents gives back the same file
+		with open(self.path, newline="") as file:
+			text = file.read()
+		exact = (text == "" or text.endswith("\n"))
+		if "\r" in text:
+			text = text.replace("\r\n", "\n").replace("\r", "\n")
+			exact = False
+		self.__text        = TextFileObj._normStr(text)
+		self.__lineOffsets = None
+		self.__srcExact    = exact
+
+	## Protected _takeSnapshot method. Contents can only be restored if they
+	# were not edited and their source file did not change.
+	#
+	# \param  self Instance of TextFileObj class.
+	# \return Tuple ("text", stat of file, contents, exact) or None.
+	def _takeSnapshot(self):
+		if self.__stream or self.__srcPath != self.path:
+			return None
+		if self.__srcStat is None or self._statKey(self.__srcPath) != self.__srcStat:
+			return None
+		return ("text", self.__srcStat, self.__text, self.__srcExact)
+
+	## Protected _restoreSnapshot method.
+	#
+	# \param self Instance of TextFileObj class.
+	# \param state Snapshot state taken by _takeSnapshot.
+	# \return Boolean. True if contents were restored.
+	def _restoreSnapshot(self, state):
+		if state[0] != "text" or self.__stream:
+			return False
+		(kind, stat, text, exact) = state
+		self.__srcPath = self.path
+		self.__srcStat = self._getDiskStat()
+		if self.__srcStat != stat:
+			return False
+		self.__text        = text
+		self.__lineOffsets = None
+		self.__srcExact    = exact
+		return True
 
 	## Private _copyFile method.
 	#
 	# \param  self Instance of TextFileObj class.
 	def _copyFile(self):
-		# Make a hard copy of old line list
-		self.__lineList = copy.deepcopy(self.__lineList)
+		# Contents and substitutions are shared with the original, as they are
+		# never changed in place
+		pass
 
 	## Substitutes a string in file
 	#
@@ -79,18 +299,337 @@ class TextFileObj(BaseFileObj):
 			raise TypeError("Parameter findStr must be a string")
 		if not isinstance(replaceStr, str):
 			raise TypeError("Parameter replaceStr must be a string")
-		# Iterates through all lines
-		for idx, line in enumerate(self.__lineList):
-			# Update line
-			self.__lineList[idx] = line.replace(findStr, replaceStr)
+		# Make sure lines were read
+		self._load()
+		# Lines never have line breaks, so findStr is only found in a line
+		if self.__stream:
+			if findStr == "":
+				raise ValueError("Parameter findStr cannot be empty in stream mode")
+			if "\n" not in findStr:
+				self.__recordSub(re.compile(re.escape(findStr)), lambda match: replaceStr, len(findStr))
+			return
+		newText = TextFileObj._subStr(self.__text, findStr, replaceStr)
+		# Flag file to be written
+		if newText is not None:
+			self.__setText(newText)
+
+	## Protected _subStr method. Substitutes a string in contents of file,
+	# line by line.
+	#
+	# \param text String with contents of file.
+	# \param findStr String to be replaced.
+	# \param replaceStr String used in replacement.
+	# \return String with new contents, or None if nothing changed.
+	@staticmethod
+	def _subStr(text, findStr, replaceStr):
+		# Lines never have line breaks, so findStr is only found in a line
+		if "\n" in findStr or findStr not in text:
+			return None
+		# Empty string is found at start and end of each line, but not around line breaks
+		if findStr == "":
+			return "".join(line.replace(findStr, replaceStr) + "\n" for line in text.split("\n")[:-1])
+		return TextFileObj._normStr(text.replace(findStr, replaceStr))
+
+	## Substitutes many strings in file, in a single pass over its contents.
+	#
+	# Contents are scanned from start to end. At each position, the longest key
+	# of mapping found there is replaced by its value. Replaced text is never
+	# scanned again, so values are not replaced by other keys.
+	#
+	# \param self Instance of TextFileObj class.
+	# \param mapping Dictionary with strings to be replaced as keys, and strings
+	#                used in replacement as values.
+	def strSubMany(self, mapping):
+		regexp = TextFileObj._compileStrMap(mapping)
+		if regexp is not None:
+			self._regexpSub(regexp, lambda match: mapping[match.group(0)], max(len(findStr) for findStr in mapping))
+
+	## Substitutes a regexp in file.
+	#
+	# Regexp is applied to the whole contents of file, so patterns can match
+	# across lines (e.g. using re.MULTILINE or re.DOTALL flags).
+	#
+	# \param self Instance of TextFileObj class.
+	# \param pattern String or compiled regexp to be replaced.
+	# \param repl String or function used in replacement, as in re.sub.
+	# \param flags Optional integer with re flags, only for string patterns.
+	def regexSub(self, pattern, repl, flags=0):
+		regexp = TextFileObj._compileRegexp(pattern, repl, flags)
+		self._regexpSub(regexp, repl)
+
+	## Protected _compileRegexp method. Validates regexp substitution inputs and
+	# compiles pattern, if not compiled yet.
+	#
+	# \param pattern String or compiled regexp to be replaced.
+	# \param repl String or function used in replacement, as in re.sub.
+	# \param flags Integer with re flags, only for string patterns.
+	# \return Compiled regexp.
+	@staticmethod
+	def _compileRegexp(pattern, repl, flags):
+		# Checks inputs
+		if not isinstance(repl, str) and not callable(repl):
+			raise TypeError("Parameter repl must be a string or a function")
+		if isinstance(flags, bool) or not isinstance(flags, int):
+			raise TypeError("Parameter flags must be an integer")
+		if isinstance(pattern, re.Pattern):
+			if flags != 0:
+				raise ValueError("Parameter flags cannot be used with a compiled pattern")
+			return pattern
+		if not isinstance(pattern, str):
+			raise TypeError("Parameter pattern must be a string or a compiled regexp")
+		try:
+			return TextFileObj.__cachedCompile(pattern, int(flags))
+		except re.error as e:
+			raise ValueError("Invalid regexp %s: %s" % (pattern, str(e)))
+
+	## Private __cachedCompile method. Compiles a regexp, keeping the most
+	# recently used ones, so the same pattern is not compiled for every file.
+	#
+	# \param pattern String with regexp.
+	# \param flags Integer with re flags.
+	# \return Compiled regexp.
+	@staticmethod
+	@functools.lru_cache(maxsize=256)
+	def __cachedCompile(pattern, flags):
+		return re.compile(pattern, flags)
+
+	## Protected _compileStrMap method. Validates a mapping of strings to be
+	# replaced and compiles a regexp matching the longest of its keys.
+	#
+	# Keys are arranged as a trie (e.g. foo, foobar and fob give
+	# fo(?:b|o(?:bar)?)), so matching costs depend on the length of keys and not
+	# on how many keys there are.
+	#
+	# \param mapping Dictionary with strings to be replaced as keys, and strings
+	#                used in replacement as values.
+	# \return Compiled regexp, or None if mapping is empty.
+	@staticmethod
+	def _compileStrMap(mapping):
+		# Checks inputs
+		if not isinstance(mapping, dict):
+			raise TypeError("Parameter mapping must be a dictionary")
+		for findStr, replaceStr in mapping.items():
+			if not isinstance(findStr, str) or not isinstance(replaceStr, str):
+				raise TypeError("Parameter mapping must only have strings as keys and values")
+			if findStr == "":
+				raise ValueError("Parameter mapping cannot have an empty key")
+		if not mapping:
+			return None
+		# Build trie of keys, where None marks the end of a key
+		trie = {}
+		for findStr in mapping:
+			node = trie
+			for char in findStr:
+				node = node.setdefault(char, {})
+			node[None] = None
+		return re.compile(TextFileObj.__trieRegexp(trie))
+
+	## Private __trieRegexp method. Builds regexp matching the longest key of a trie.
+	#
+	# \param trie Dictionary with a trie node.
+	# \return String with regexp.
+	@staticmethod
+	def __trieRegexp(trie):
+		alternativeList = []
+		for char in sorted(key for key in trie if key is not None):
+			# Chains of single kids need no groups
+			node = trie[char]
+			chain = char
+			while len(node) == 1 and None not in node:
+				(char, node), = node.items()
+				chain += char
+			alternativeList.append(re.escape(chain) + TextFileObj.__trieRegexp(node))
+		if not alternativeList:
+			return ""
+		regexp = "|".join(alternativeList)
+		# Longer keys are optional when a key ends here, and greedy, so the longest match wins
+		if None in trie:
+			return "(?:%s)?" % regexp
+		if len(alternativeList) > 1:
+			return "(?:%s)" % regexp
+		return regexp
+
+	## Protected _regexpSub method. Substitutes a compiled regexp in the whole
+	# contents of file.
+	#
+	# \param self Instance of TextFileObj class.
+	# \param regexp Compiled regexp.
+	# \param repl String or function used in replacement, as in re.sub.
+	# \param maxLen Optional integer with maximum length of a match, used in
+	#               stream mode. Defaults to streamWindow.
+	def _regexpSub(self, regexp, repl, maxLen=None):
+		# Make sure lines were read
+		self._load()
+		if self.__stream:
+			if isinstance(repl, str):
+				template = repl
+				repl = lambda match: match.expand(template)
+			self.__recordSub(regexp, repl, maxLen if maxLen is not None else self.streamWindow)
+			return
+		newText = TextFileObj._regexpSubStr(self.__text, regexp, repl)
+		# Flag file to be written
+		if newText is not None:
+			self.__setText(newText)
+
+	## Protected _regexpSubStr method. Substitutes a compiled regexp in the
+	# whole contents of file.
+	#
+	# \param text String with contents of file.
+	# \param regexp Compiled regexp.
+	# \param repl String or function used in replacement, as in re.sub.
+	# \return String with new contents, or None if nothing changed.
+	@staticmethod
+	def _regexpSubStr(text, regexp, repl):
+		newText = regexp.sub(repl, text)
+		# Only update contents if something changed
+		if newText == text:
+			return None
+		return TextFileObj._normStr(newText)
+
+	## Private __recordSub method. Records a substitution to be applied in
+	# stream mode.
+	#
+	# \param self Instance of TextFileObj class.
+	# \param regexp Compiled regexp.
+	# \param repl Function receiving a match and returning its replacement.
+	# \param maxLen Integer with maximum length of a match.
+	def __recordSub(self, regexp, repl, maxLen):
+		self.__subList += ((regexp, repl, maxLen),)
+		self._setModified()
+
+	## Protected _setStr method. Updates contents of file, and flags file to
+	# be written.
+	#
+	# \param self Instance of TextFileObj class.
+	# \param text String with contents of file.
+	def _setStr(self, text):
+		self._load()
+		self.__setText(TextFileObj._normStr(text))
+
+	## Protected _normStr method. Adds the line break ending the last line of
+	# contents of file, if it is missing.
+	#
+	# \param text String with contents of file.
+	# \return String with contents of file.
+	@staticmethod
+	def _normStr(text):
+		if text == "" or text.endswith("\n"):
+			return text
+		return text + "\n"
+
+	## Private __setText method. Updates contents after an edit, and flags
+	# file to be written.
+	#
+	# \param self Instance of TextFileObj class.
+	# \param text String with contents of file, ending with a line break.
+	def __setText(self, text):
+		self.__text        = text
+		self.__lineOffsets = None
+		# Contents are not the ones of source file anymore
+		self.__srcPath  = None
+		self.__srcStat  = None
+		self._setModified()
+
+	## Private __getLineOffsets method. Gets offsets where each line starts,
+	# followed by the length of contents.
+	#
+	# \param  self Instance of TextFileObj class.
+	# \return Array of integers.
+	def __getLineOffsets(self):
+		if self.__lineOffsets is None:
+			# Line breaks are found in place, so no string is created for each line
+			lineOffsets = array.array("q", [0])
+			lineOffsets.extend(match.end() for match in re.finditer("\n", self.__text))
+			self.__lineOffsets = lineOffsets
+		return self.__lineOffsets
+
+	## Iterates through lines of file, without their line breaks. Lines are
+	# split from chunks of contents, so they are never all held at once.
+	#
+	# \param  self Instance of TextFileObj class.
+	# \return Generator of strings.
+	def iterLines(self):
+		rest = ""
+		for chunk in self.iterChunks():
+			lineList = (rest + chunk).split("\n")
+			rest = lineList.pop()
+			yield from lineList
+
+	## Iterates through chunks of contents of file. In stream mode, chunks are
+	# read from source file with substitutions applied, so they may be longer
+	# or shorter than chunkSize.
+	#
+	# \param self Instance of TextFileObj class.
+	# \param chunkSize Optional integer with number of characters of each
+	#                  chunk. Defaults to streamChunkSize.
+	# \return Generator of strings.
+	def iterChunks(self, chunkSize=None):
+		# Validate input type
+		if chunkSize is None:
+			chunkSize = self.streamChunkSize
+		if isinstance(chunkSize, bool) or not isinstance(chunkSize, int):
+			raise TypeError("Parameter chunkSize must be an integer")
+		if chunkSize < 1:
+			raise ValueError("Parameter chunkSize must be a positive number of characters")
+		# Make sure contents were read
+		self._load()
+		if self.__stream:
+			yield from self.__iterStream(chunkSize)
+			return
+		text = self.__text
+		for start in range(0, len(text), chunkSize):
+			yield text[start:start+chunkSize]
+
+	## Returns the number of lines of file.
+	#
+	# \param  self Instance of TextFileObj class.
+	# \return Integer
+	def getLineCount(self):
+		self.__checkNotStream()
+		return len(self.__getLineOffsets()) - 1
+
+	## Returns a line of file, without its line break.
+	#
+	# \param self Instance of TextFileObj class.
+	# \param idx Integer with index of line, starting at 0
+	# \return String
+	def getLine(self, idx):
+		# Validate input type
+		if isinstance(idx, bool) or not isinstance(idx, int):
+			raise TypeError("Parameter idx must be an integer")
+		self.__checkNotStream()
+		lineOffsets = self.__getLineOffsets()
+		if idx < 0 or idx >= len(lineOffsets) - 1:
+			raise ValueError("Could not find line %d in file %s" % (idx, self.path))
+		return self.__text[lineOffsets[idx]:lineOffsets[idx+1]-1]
+
+	## Private __checkNotStream method. Makes sure lines were read, as they
+	# are never held in memory in stream mode.
+	#
+	# \param  self Instance of TextFileObj class.
+	def __checkNotStream(self):
+		if self.__stream:
+			raise RuntimeError("Lines of file %s are not available in stream mode" % self.path)
+		self._load()
+
+	## Protected _hashFile method. Contents are hashed one chunk at a time, so
+	# files in stream mode are never held in memory.
+	#
+	# \param  self Instance of TextFileObj class.
+	# \return Bytes with digest.
+	def _hashFile(self):
+		digest = self._newDigest()
+		for chunk in self.iterChunks():
+			digest.update(chunk.encode("utf-8", "surrogatepass"))
+		return digest.digest()
 
 	## Returns a string with contents of file.
 	#
 	# \param  self Instance of TextFileObj class.
 	# \return String
 	def getStr(self):
-		returnStr = ""
-		for line in self.__lineList:
-			returnStr += line + "\n"
-
-		return returnStr
+		# Make sure lines were read
+		self._load()
+		if self.__stream:
+			return "".join(self.__iterStream(self.streamChunkSize))
+		return self.__text
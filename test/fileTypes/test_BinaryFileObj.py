@@ -0,0 +1,111 @@
+## \file test_BinaryFileObj.py
+#  \brief Testcases for BinaryFileObj class
+#
+# Revision | Author            | Date     | Comment
+#:---------|:------------------|:---------|:----------------
+# 1.0      | pytomation team   | 10/18/26 | Initial version
+#
+import unittest
+import os
+import sys
+import shutil
+sys.path.append(os.path.realpath("../pytomation/fileTypes"))
+from DirFileObj import DirFileObj
+from BinaryFileObj import BinaryFileObj
+
+class BinaryFileObjTest(unittest.TestCase):
+
+	def setUp(self):
+		self.rootFolder = "./"
+		self.testFolderName = ".BinaryFileObjTest"
+		self.testFolder = os.path.realpath(self.rootFolder+self.testFolderName)
+		# Create it
+		try:
+			os.mkdir(self.testFolder)
+		except Exception as e:
+			raise RuntimeError("Error trying to create directory %s: %s" % (self.testFolder,str(e)))
+		self.testDir = DirFileObj(path=self.testFolder)
+		# Sample binary file to read
+		self.readFilePath = self.testFolder+"/file0.bin"
+		self.readFileContent = bytes(range(256)) * 4
+		with open(self.readFilePath, "wb") as file:
+			file.write(self.readFileContent)
+		# Sample text file
+		self.textFilePath = os.path.realpath(self.rootFolder+"fileTypes/dirExample/file0.txt")
+
+	def tearDown(self):
+		shutil.rmtree(self.testFolder)
+
+	## Building a BinaryFileObj
+	def test_emptyConstructor(self):
+		with self.assertRaises(RuntimeError):
+			BinaryFileObj()
+
+	def test_constructorPath(self):
+		bf = BinaryFileObj(path=self.readFilePath)
+		self.assertEqual(bf.getBytes(), self.readFileContent)
+		self.assertEqual(bf.getView().tobytes(), self.readFileContent)
+		self.assertTrue(bf.getView().readonly)
+
+	def test_constructorFatherFileFatherSelf(self):
+		bf = BinaryFileObj(path=self.readFilePath)
+		with self.assertRaises(RuntimeError):
+			BinaryFileObj(name="tmp", father=bf)
+
+	## Telling binary files
+	def test_isBinaryFileTypeError(self):
+		with self.assertRaises(TypeError):
+			BinaryFileObj.isBinaryFile(0)
+
+	def test_isBinaryFile(self):
+		self.assertTrue(BinaryFileObj.isBinaryFile(self.readFilePath))
+		self.assertFalse(BinaryFileObj.isBinaryFile(self.textFilePath))
+		latinPath = self.testFolder+"/latin.txt"
+		with open(latinPath, "wb") as file:
+			file.write("Café\n".encode("latin-1"))
+		self.assertTrue(BinaryFileObj.isBinaryFile(latinPath))
+		# Character cut at the end of sniffed bytes
+		cutPath = self.testFolder+"/cut.txt"
+		with open(cutPath, "wb") as file:
+			file.write(b"a" * (BinaryFileObj.sniffSize - 1) + "é".encode("utf-8"))
+		self.assertFalse(BinaryFileObj.isBinaryFile(cutPath))
+		# Files that cannot be read are text
+		self.assertFalse(BinaryFileObj.isBinaryFile(self.testFolder+"/missing.bin"))
+
+	## Substituting bytes
+	def test_bytesSubTypeError(self):
+		bf = BinaryFileObj(path=self.readFilePath)
+		with self.assertRaises(TypeError):
+			bf.bytesSub(findBytes="a", replaceBytes=b"b")
+		with self.assertRaises(TypeError):
+			bf.bytesSub(findBytes=b"a", replaceBytes="b")
+		with self.assertRaises(ValueError):
+			bf.bytesSub(findBytes=b"", replaceBytes=b"b")
+
+	def test_bytesSub(self):
+		bf = BinaryFileObj(path=self.readFilePath)
+		newBf = bf.copy(name="tmp", father=self.testDir)
+		newBf.bytesSub(findBytes=b"\0\1\2", replaceBytes=b"\3")
+		self.assertEqual(bf.getBytes(), self.readFileContent)
+		self.assertEqual(newBf.getBytes(), self.readFileContent.replace(b"\0\1\2", b"\3"))
+		newBf.write()
+		with open(self.testFolder+"/tmp", "rb") as file:
+			self.assertEqual(file.read(), newBf.getBytes())
+		self.assertFalse(newBf.isDirty())
+
+	## Writing a BinaryFileObj
+	def test_writeCopy(self):
+		bf = BinaryFileObj(path=self.readFilePath)
+		newBf = bf.copy(name="tmp", father=self.testDir)
+		newBf.write()
+		with open(self.testFolder+"/tmp", "rb") as file:
+			self.assertEqual(file.read(), self.readFileContent)
+
+	def test_writeCopySourceChanged(self):
+		bf = BinaryFileObj(path=self.readFilePath)
+		newBf = bf.copy(name="tmp", father=self.testDir)
+		with open(self.readFilePath, "wb") as file:
+			file.write(b"\0")
+		newBf.write()
+		with open(self.testFolder+"/tmp", "rb") as file:
+			self.assertEqual(file.read(), self.readFileContent)
@@ -8,9 +8,14 @@
 import unittest
 import os
 import sys
+import re
 import shutil
+import pickle
+import asyncio
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.realpath("../pytomation/fileTypes"))
-from DirFileObj import DirFileObj
+from DirFileObj import DirFileObj, _readSnapshot
 
 class DirFileObjTest(unittest.TestCase):
 
@@ -33,6 +38,26 @@ class DirFileObjTest(unittest.TestCase):
 	def tearDown(self):
 		shutil.rmtree(self.testFolder)
 
+	## Creates a tree of directories and files under the test folder
+	def createTree(self, dirName, depth=3, fanOut=3):
+		dirPath = self.testFolder+"/"+dirName
+		os.mkdir(dirPath)
+		for idx in range(fanOut):
+			with open(dirPath+"/file%d.txt" % idx, "w") as file:
+				file.write("File %d of %s\n\nLine\n" % (idx, dirName))
+			if depth > 1:
+				self.createTree(dirName+"/dir%d" % idx, depth-1, fanOut)
+		return dirPath
+
+	## Asserts two DirFileObj have the same contents, in the same order
+	def assertSameTree(self, d0, d1):
+		self.assertEqual(d0.getFileList(),d1.getFileList())
+		self.assertEqual(d0.getDirList(),d1.getDirList())
+		for fileName in d0.getFileList():
+			self.assertEqual(d0.getFile(fileName).getStr(),d1.getFile(fileName).getStr())
+		for dirName in d0.getDirList():
+			self.assertSameTree(d0.getDir(dirName),d1.getDir(dirName))
+
 	## Building a DirFileObj
 	def test_emptyConstructor(self):
 		with self.assertRaises(RuntimeError):
@@ -131,6 +156,89 @@ class DirFileObjTest(unittest.TestCase):
 		expectedFileContent += ""
 		self.assertEqual(f.getStr(),expectedFileContent)
 
+	def test_constructorLazyTypeError(self):
+		dirPath = os.path.realpath(self.rootFolder+"fileTypes/dirExample")
+		with self.assertRaises(TypeError):
+			DirFileObj(path=dirPath, lazy=0)
+
+	def test_constructorPathLazy(self):
+		dirPath = os.path.realpath(self.rootFolder+"fileTypes/dirExample")
+		d = DirFileObj(path=dirPath, lazy=True)
+		self.assertTrue(d.isLazy())
+		self.assertFalse(d.isLoaded())
+		self.assertEqual(d.getDirList(),["subdirExample"])
+		self.assertTrue(d.isLoaded())
+		f = d.getFile("file0.txt")
+		self.assertTrue(f.isLazy())
+		self.assertFalse(f.isLoaded())
+		subD = d.getDir("subdirExample")
+		self.assertFalse(subD.isLoaded())
+		expectedFileContent  = "Sample File\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "With\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "5 lines of text\n"
+		expectedFileContent += ""
+		self.assertEqual(f.getStr(),expectedFileContent)
+		self.assertTrue(f.isLoaded())
+		self.assertFalse(subD.isLoaded())
+		self.assertEqual(subD.getFileList(),["fileSub.txt"])
+		self.assertFalse(subD.getFile("fileSub.txt").isLoaded())
+
+	def test_copyLazy(self):
+		copyName = "objCopy"
+		dirPath = os.path.realpath(self.rootFolder+"fileTypes/dirExample")
+		rootD = DirFileObj(path=self.testFolder, lazy=True)
+		d = DirFileObj(path=dirPath, lazy=True)
+		d.copy(name=copyName, father=rootD)
+		rootD.write()
+		self.assertEqual(sorted(os.listdir(self.testFolder+"/"+copyName)),["file0.txt", "subdirExample"])
+		# Read new files
+		d = DirFileObj(path=self.testFolder+"/"+copyName)
+		self.assertFalse(d.isLazy())
+		f = d.getDir("subdirExample").getFile("fileSub.txt")
+		self.assertTrue(f.isLoaded())
+		expectedFileContent  = "Sample File\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "For Regexp For Regexp For Regexp\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "For Regexp\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "MyRegexp\n"
+		expectedFileContent += ""
+		self.assertEqual(f.getStr(),expectedFileContent)
+
+	def test_writeLazy(self):
+		copyName = "objCopy"
+		dirPath = os.path.realpath(self.rootFolder+"fileTypes/dirExample")
+		rootD = DirFileObj(path=self.testFolder)
+		DirFileObj(path=dirPath).copy(name=copyName, father=rootD)
+		rootD.write()
+		# Write a lazy tree that was never read back to its own path
+		d = DirFileObj(path=self.testFolder+"/"+copyName, lazy=True)
+		d.getDir("subdirExample").getFile("fileSub.txt").strSub(findStr="Sample",replaceStr="Example")
+		d.write()
+		d = DirFileObj(path=self.testFolder+"/"+copyName)
+		self.assertEqual(d.getFile("file0.txt").getStr().split("\n")[0],"Sample File")
+		self.assertEqual(d.getDir("subdirExample").getFile("fileSub.txt").getStr().split("\n")[0],"Example File")
+
+	def test_constructorExecutorTypeError(self):
+		with self.assertRaises(TypeError):
+			DirFileObj(path=self.testFolder, executor="4")
+
+	def test_constructorExecutorValueError(self):
+		with self.assertRaises(ValueError):
+			DirFileObj(path=self.testFolder, executor=0)
+
+	def test_constructorPathExecutor(self):
+		treePath = self.createTree("tree")
+		d = DirFileObj(path=treePath)
+		parallelD = DirFileObj(path=treePath, executor=4)
+		self.assertTrue(parallelD.getDir("dir2").getDir("dir2").getFile("file2.txt").isLoaded())
+		self.assertSameTree(parallelD, d)
+		with ThreadPoolExecutor(max_workers=2) as executor:
+			self.assertSameTree(DirFileObj(path=treePath, executor=executor), d)
+
 	def test_constructorWithFatherNameTypeError(self):
 		rootD = DirFileObj(path=self.testFolder)
 		with self.assertRaises(TypeError):
@@ -177,6 +285,23 @@ class DirFileObjTest(unittest.TestCase):
 		self.assertEqual(os.listdir(self.testFolder),[dirName])
 		self.assertEqual(os.listdir(self.testFolder+"/"+dirName),[dirName])
 
+	def test_rootAndPath(self):
+		dirPath = os.path.realpath(self.rootFolder+"fileTypes/dirExample")
+		d = DirFileObj(path=dirPath)
+		subD = d.getDir("subdirExample")
+		self.assertIs(d.root, d)
+		self.assertIs(subD.root, d)
+		self.assertEqual(subD.getFile("fileSub.txt").path, dirPath+"/subdirExample/fileSub.txt")
+		# Copies get the root and path of their new father
+		rootD = DirFileObj(path=self.testFolder)
+		newD = DirFileObj(name="tmpDir", father=rootD)
+		copyD = subD.copy(name="subCopy", father=newD)
+		copyF = copyD.getFile("fileSub.txt")
+		self.assertIs(copyF.root, rootD)
+		self.assertEqual(copyF.path, self.testFolder+"/tmpDir/subCopy/fileSub.txt")
+		self.assertIs(subD.root, d)
+		self.assertEqual(subD.path, dirPath+"/subdirExample")
+
 	# Getting directories
 	def test_getDirTypeError(self):
 		dirName = "tmpDir"
@@ -203,6 +328,15 @@ class DirFileObjTest(unittest.TestCase):
 		self.assertEqual(d.getFileList(),[])
 		self.assertEqual(d.father.name,self.testFolderName)
 
+	def test_getDirView(self):
+		rootD = DirFileObj(path=self.testFolder)
+		dirView = rootD.getDirView()
+		self.assertEqual(list(dirView),[])
+		DirFileObj(name="tmpDir", father=rootD)
+		self.assertEqual(list(dirView),["tmpDir"])
+		self.assertIn("tmpDir", dirView)
+		self.assertEqual(list(rootD.getFileView()),[])
+
 	# Getting files
 	def test_getFileTypeError(self):
 		dirPath = os.path.realpath(self.rootFolder+"fileTypes/dirExample")
@@ -284,3 +418,604 @@ class DirFileObjTest(unittest.TestCase):
 		expectedFileContent += "MyRegexp\n"
 		expectedFileContent += ""
 		self.assertEqual(f.getStr(),expectedFileContent)
+
+	# Writing directories
+	def test_writeOnlyModified(self):
+		copyName = "objCopy"
+		dirPath = os.path.realpath(self.rootFolder+"fileTypes/dirExample")
+		rootD = DirFileObj(path=self.testFolder)
+		DirFileObj(path=dirPath).copy(name=copyName, father=rootD)
+		self.assertTrue(rootD.isDirty())
+		self.assertFalse(rootD.isModified())
+		rootD.write()
+		self.assertFalse(rootD.isDirty())
+		copyPath = self.testFolder+"/"+copyName
+		d = DirFileObj(path=copyPath)
+		self.assertFalse(d.isDirty())
+		# Unknown files on disk are kept while directory is not modified
+		open(copyPath+"/unknown.txt", "w").close()
+		f = d.getDir("subdirExample").getFile("fileSub.txt")
+		f.strSub(findStr="Nothing",replaceStr="Example")
+		self.assertFalse(d.isDirty())
+		f.strSub(findStr="Sample",replaceStr="Example")
+		self.assertTrue(f.isModified())
+		self.assertTrue(d.isDirty())
+		self.assertFalse(d.isModified())
+		self.assertFalse(d.getFile("file0.txt").isDirty())
+		os.remove(copyPath+"/file0.txt")
+		d.write()
+		self.assertFalse(d.isDirty())
+		self.assertEqual(sorted(os.listdir(copyPath)),["subdirExample", "unknown.txt"])
+		d = DirFileObj(path=copyPath)
+		self.assertEqual(d.getDir("subdirExample").getFile("fileSub.txt").getStr().split("\n")[0],"Example File")
+
+	def test_writeRemovesUnknown(self):
+		copyName = "objCopy"
+		dirPath = os.path.realpath(self.rootFolder+"fileTypes/dirExample")
+		rootD = DirFileObj(path=self.testFolder)
+		DirFileObj(path=dirPath).copy(name=copyName, father=rootD)
+		rootD.write()
+		copyPath = self.testFolder+"/"+copyName
+		d = DirFileObj(path=copyPath)
+		file0Ino = os.stat(copyPath+"/file0.txt").st_ino
+		open(copyPath+"/unknown.txt", "w").close()
+		os.mkdir(copyPath+"/unknownDir")
+		d.removeDir("subdirExample")
+		self.assertTrue(d.isModified())
+		d.write()
+		self.assertEqual(sorted(os.listdir(copyPath)),["file0.txt"])
+		self.assertEqual(os.stat(copyPath+"/file0.txt").st_ino,file0Ino)
+
+	## Symbolic links to directories are written through
+	def test_writeSymlinkDir(self):
+		otherPath = self.testFolder+"/other"
+		os.mkdir(otherPath)
+		for fileName in ["a.txt", "b.txt"]:
+			with open(otherPath+"/"+fileName, "w") as file:
+				file.write("File %s\n" % fileName)
+		treePath = self.testFolder+"/tree"
+		os.mkdir(treePath)
+		os.symlink("../other", treePath+"/link")
+		d = DirFileObj(path=treePath)
+		d.getDir("link").removeFile("a.txt")
+		d.write()
+		self.assertTrue(os.path.islink(treePath+"/link"))
+		self.assertEqual(os.listdir(otherPath), ["b.txt"])
+		with open(otherPath+"/b.txt") as file:
+			self.assertEqual(file.read(), "File b.txt\n")
+
+	# Removing directories and files
+	def test_removeDirTypeError(self):
+		rootD = DirFileObj(path=self.testFolder)
+		with self.assertRaises(TypeError):
+			rootD.removeDir(0)
+
+	def test_removeDirInvalid(self):
+		rootD = DirFileObj(path=self.testFolder)
+		with self.assertRaises(ValueError):
+			rootD.removeDir("invalid")
+
+	def test_removeFileInvalid(self):
+		rootD = DirFileObj(path=self.testFolder)
+		with self.assertRaises(ValueError):
+			rootD.removeFile("invalid")
+
+	def test_removeFile(self):
+		copyName = "objCopy"
+		dirPath = os.path.realpath(self.rootFolder+"fileTypes/dirExample")
+		rootD = DirFileObj(path=self.testFolder)
+		d = DirFileObj(path=dirPath).copy(name=copyName, father=rootD)
+		d.removeFile("file0.txt")
+		self.assertEqual(d.getFileList(),[])
+		rootD.write()
+		self.assertEqual(sorted(os.listdir(self.testFolder+"/"+copyName)),["subdirExample"])
+
+	def test_writeExecutor(self):
+		treePath = self.createTree("tree")
+		rootD = DirFileObj(path=self.testFolder)
+		DirFileObj(path=treePath).copy(name="treeCopy", father=rootD)
+		rootD.write(executor=4)
+		self.assertFalse(rootD.isDirty())
+		self.assertSameTree(DirFileObj(path=self.testFolder+"/treeCopy"), DirFileObj(path=treePath))
+		with self.assertRaises(TypeError):
+			rootD.write(executor="4")
+
+	def test_lazyExecutorPartlyListed(self):
+		treePath = self.createTree("tree", depth=3, fanOut=2)
+		d = DirFileObj(path=treePath, lazy=True, executor=2)
+		# Directory listed before everything is read
+		d.getDir("dir0").getDirList()
+		self.assertEqual(len(d.glob("**/*.txt")), 14)
+		rootD = DirFileObj(path=self.testFolder, lazy=True)
+		d.copy(name="treeCopy", father=rootD)
+		self.assertTrue(d.getDir("dir0").getDir("dir1").getFile("file1.txt").isLoaded())
+		rootD.write()
+		self.assertSameTree(DirFileObj(path=self.testFolder+"/treeCopy"), DirFileObj(path=treePath))
+
+	def test_writeReportsAllErrors(self):
+		treePath = self.createTree("tree")
+		d = DirFileObj(path=treePath)
+		for dirName in ["dir0", "dir1", "dir2"]:
+			d.getDir(dirName).getFile("file0.txt").strSub(findStr="File",replaceStr="Edited")
+		# Remove two directories behind the back of the tree
+		shutil.rmtree(treePath+"/dir0")
+		shutil.rmtree(treePath+"/dir1")
+		with self.assertRaises(RuntimeError) as cm:
+			d.write(executor=2)
+		self.assertIn(treePath+"/dir0/file0.txt", str(cm.exception))
+		self.assertIn(treePath+"/dir1/file0.txt", str(cm.exception))
+		# Everything else was written, failing files are still dirty
+		self.assertTrue(d.isDirty())
+		self.assertFalse(d.getDir("dir2").isDirty())
+		self.assertTrue(d.getDir("dir0").getFile("file0.txt").isDirty())
+		with open(treePath+"/dir2/file0.txt") as file:
+			self.assertEqual(file.readline(),"Edited 0 of tree/dir2\n")
+
+	# Substituting strings
+	def test_strSubMany(self):
+		treePath = self.createTree("tree", depth=2)
+		d = DirFileObj(path=treePath)
+		d.strSubMany({"File":"Doc", "Line":"Row", "tree/dir1":"other"})
+		self.assertEqual(d.getFile("file0.txt").getStr(),"Doc 0 of tree\n\nRow\n")
+		self.assertEqual(d.getDir("dir1").getFile("file2.txt").getStr(),"Doc 2 of other\n\nRow\n")
+		d.write()
+		self.assertSameTree(DirFileObj(path=treePath), d)
+		# Files in stream mode only look ahead as far as the longest string
+		with mock.patch.object(type(d.getFile("file0.txt")), "_regexpSub") as subMock:
+			d.strSubMany({"Doc":"File", "Row":"Line", "other":"tree/dir1"})
+		self.assertEqual(set(call[0][2] for call in subMock.call_args_list), {5})
+
+	def test_regexSub(self):
+		treePath = self.createTree("tree", depth=2)
+		d = DirFileObj(path=treePath)
+		d.regexSub("^File (\\d)", "Doc \\1", flags=0)
+		d.regexSub("\\n\\nLine$", "")
+		self.assertEqual(d.getFile("file0.txt").getStr(),"Doc 0 of tree\n")
+		self.assertEqual(d.getDir("dir1").getFile("file2.txt").getStr(),"Doc 2 of tree/dir1\n")
+
+	def test_binaryFiles(self):
+		treePath = self.createTree("tree", depth=1)
+		with open(treePath+"/image.bin", "wb") as file:
+			file.write(b"File\0\xff")
+		d = DirFileObj(path=treePath)
+		self.assertEqual(d.getFile("image.bin").getBytes(), b"File\0\xff")
+		d.strSubMany({"File":"Doc"})
+		self.assertEqual(d.getFile("file0.txt").getStr(),"Doc 0 of tree\n\nLine\n")
+		self.assertEqual(d.getFile("image.bin").getBytes(), b"File\0\xff")
+		d.copy(name="copy", father=DirFileObj(path=self.testFolder)).write()
+		with open(self.testFolder+"/copy/image.bin", "rb") as file:
+			self.assertEqual(file.read(), b"File\0\xff")
+
+	## Kind of files is only checked when they are first needed
+	def test_binaryFilesLazy(self):
+		treePath = self.createTree("tree", depth=2)
+		with open(treePath+"/dir0/image.bin", "wb") as file:
+			file.write(b"File\0\xff")
+		with mock.patch("builtins.open", wraps=open) as openMock:
+			d = DirFileObj(path=treePath, lazy=True)
+			self.assertEqual(sorted(d.getDir("dir0").getFileList()), ["file0.txt", "file1.txt", "file2.txt", "image.bin"])
+			self.assertEqual(openMock.call_count, 0)
+		# Files found are checked, but not read
+		self.assertFalse(any(fileObj.isLoaded() for fileObj in d.glob("**/*.txt")))
+		self.assertEqual(d.find("dir0/image.bin").getBytes(), b"File\0\xff")
+		self.assertIs(d.glob("**/*.bin")[0], d.getDir("dir0").getFile("image.bin"))
+		# Files are checked before being read, when reading all of them
+		for executor in [None, 2]:
+			d = DirFileObj(path=treePath, lazy=True, executor=executor)
+			d.getDir("dir0").getFileList()
+			c = d.copy(name="copy%s" % executor, father=DirFileObj(path=self.testFolder))
+			self.assertEqual(c.getDir("dir0").getFile("image.bin").getBytes(), b"File\0\xff")
+		d = asyncio.run(DirFileObj.aread(path=treePath))
+		self.assertEqual(d.getDir("dir0").getFile("image.bin").getBytes(), b"File\0\xff")
+
+	## Files that cannot be opened are read as text
+	def test_brokenSymlink(self):
+		treePath = self.createTree("tree", depth=1)
+		os.symlink(treePath+"/missing", treePath+"/broken.txt")
+		d = DirFileObj(path=treePath)
+		self.assertEqual(d.getFile("broken.txt").getStr(), "")
+		self.assertEqual(len(d.getFileList()), 4)
+		# Broken links are not new files, so they are never written
+		self.assertFalse(d.isDirty())
+		d.getFile("file0.txt").strSub("File", "Doc")
+		d.write()
+		self.assertFalse(os.path.lexists(treePath+"/missing"))
+		self.assertTrue(os.path.islink(treePath+"/broken.txt"))
+		self.assertEqual(d.refresh(), [])
+		self.assertIn("broken.txt", d.getFileList())
+		self.assertFalse(d.isDirty())
+
+	# Snapshots
+	def setPastTime(self, path):
+		for (myPath, subdirList, fileList) in os.walk(path, topdown=False):
+			for name in fileList + subdirList:
+				os.utime(os.path.join(myPath, name), ns=(10**18, 10**18))
+		os.utime(path, ns=(10**18, 10**18))
+
+	def test_snapshotTypeError(self):
+		with self.assertRaises(TypeError):
+			DirFileObj(path=self.testFolder, snapshot=0)
+		with self.assertRaises(TypeError):
+			DirFileObj(path=self.testFolder).saveSnapshot(0)
+		with self.assertRaises(RuntimeError):
+			DirFileObj(name="tmp", father=DirFileObj(path=self.testFolder), snapshot="snapshot")
+
+	def test_snapshot(self):
+		treePath = self.createTree("tree", depth=2)
+		with open(treePath+"/image.bin", "wb") as file:
+			file.write(b"File\0\xff")
+		self.setPastTime(treePath)
+		snapshotPath = self.testFolder+"/snapshot"
+		d = DirFileObj(path=treePath)
+		d.saveSnapshot(snapshotPath)
+		# Edit a file without changing its stat, so only a restored one is not read
+		with open(treePath+"/file0.txt", "w") as file:
+			file.write("Edit 0 of tree\n\nLine\n")
+		os.utime(treePath+"/file0.txt", ns=(10**18, 10**18))
+		# Change another one
+		with open(treePath+"/dir1/file2.txt", "w") as file:
+			file.write("Changed\n")
+		newD = DirFileObj(path=treePath, snapshot=snapshotPath)
+		self.assertEqual(newD.getFile("file0.txt").getStr(), "File 0 of tree\n\nLine\n")
+		self.assertEqual(newD.getDir("dir1").getFile("file2.txt").getStr(), "Changed\n")
+		self.assertEqual(newD.getFile("image.bin").getBytes(), b"File\0\xff")
+		self.assertEqual(newD.getFileList(), d.getFileList())
+		self.assertEqual(newD.getDirList(), d.getDirList())
+		self.assertFalse(newD.isDirty())
+
+	def test_snapshotNewFile(self):
+		treePath = self.createTree("tree", depth=1)
+		self.setPastTime(treePath)
+		snapshotPath = self.testFolder+"/snapshot"
+		DirFileObj(path=treePath).saveSnapshot(snapshotPath)
+		with open(treePath+"/new.txt", "w") as file:
+			file.write("New\n")
+		newD = DirFileObj(path=treePath, snapshot=snapshotPath)
+		self.assertEqual(newD.getFile("new.txt").getStr(), "New\n")
+		self.assertEqual(newD.getFile("file1.txt").getStr(), "File 1 of tree\n\nLine\n")
+
+	def test_snapshotRacy(self):
+		treePath = self.createTree("tree", depth=1)
+		snapshotPath = self.testFolder+"/snapshot"
+		DirFileObj(path=treePath).saveSnapshot(snapshotPath)
+		# Files were just modified, so they are read again
+		stat = os.stat(treePath+"/file0.txt")
+		with open(treePath+"/file0.txt", "w") as file:
+			file.write("Edit 0 of tree\n\nLine\n")
+		os.utime(treePath+"/file0.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+		newD = DirFileObj(path=treePath, snapshot=snapshotPath)
+		self.assertEqual(newD.getFile("file0.txt").getStr(), "Edit 0 of tree\n\nLine\n")
+
+	def test_snapshotInvalid(self):
+		treePath = self.createTree("tree", depth=1)
+		self.setPastTime(treePath)
+		snapshotPath = self.testFolder+"/snapshot"
+		with open(snapshotPath, "wb") as file:
+			file.write(b"invalid")
+		d = DirFileObj(path=treePath, snapshot=snapshotPath)
+		self.assertEqual(d.getFile("file0.txt").getStr(), "File 0 of tree\n\nLine\n")
+		# Snapshot of another tree
+		d.saveSnapshot(snapshotPath)
+		otherPath = self.testFolder+"/other"
+		shutil.copytree(treePath, otherPath)
+		otherD = DirFileObj(path=otherPath, snapshot=snapshotPath)
+		self.assertEqual(otherD.getFileList(), d.getFileList())
+		# Truncated snapshot
+		with open(snapshotPath, "rb") as file:
+			data = file.read()
+		with open(snapshotPath, "wb") as file:
+			file.write(data[:-3])
+		d = DirFileObj(path=treePath, snapshot=snapshotPath)
+		self.assertEqual(d.getFile("file0.txt").getStr(), "File 0 of tree\n\nLine\n")
+		# Pickles are not loaded
+		with open(snapshotPath, "wb") as file:
+			pickle.dump({"version": 2, "path": treePath, "stateDict": {}}, file)
+		d = DirFileObj(path=treePath, snapshot=snapshotPath)
+		self.assertEqual(d.getFile("file0.txt").getStr(), "File 0 of tree\n\nLine\n")
+		# Missing snapshot
+		d = DirFileObj(path=treePath, snapshot=self.testFolder+"/missing")
+		self.assertEqual(d.getFile("file0.txt").getStr(), "File 0 of tree\n\nLine\n")
+
+	# Refreshing from disk
+	def test_refresh(self):
+		treePath = self.createTree("tree", depth=2)
+		d = DirFileObj(path=treePath)
+		fileObj = d.getFile("file0.txt")
+		otherFileObj = d.getFile("file1.txt")
+		with open(treePath+"/file0.txt", "w") as file:
+			file.write("Changed\n")
+		with open(treePath+"/new.txt", "w") as file:
+			file.write("New\n")
+		os.mkdir(treePath+"/newDir")
+		os.remove(treePath+"/file2.txt")
+		shutil.rmtree(treePath+"/dir1")
+		self.assertEqual(d.refresh(), [])
+		self.assertIs(d.getFile("file0.txt"), fileObj)
+		self.assertIs(d.getFile("file1.txt"), otherFileObj)
+		self.assertEqual(fileObj.getStr(), "Changed\n")
+		self.assertEqual(d.find("new.txt").getStr(), "New\n")
+		self.assertEqual(sorted(d.getFileList()), ["file0.txt", "file1.txt", "new.txt"])
+		self.assertEqual(sorted(d.getDirList()), ["dir0", "dir2", "newDir"])
+		with self.assertRaises(ValueError):
+			d.find("dir1/file0.txt")
+		self.assertFalse(d.isDirty())
+
+	def test_refreshConflicts(self):
+		treePath = self.createTree("tree", depth=2)
+		d = DirFileObj(path=treePath)
+		d.getFile("file0.txt").strSub("File", "Doc")
+		d.getDir("dir1").getFile("file0.txt").strSub("File", "Doc")
+		d.getFile("file1.txt").copy(name="copy.txt", father=d)
+		with open(treePath+"/file0.txt", "w") as file:
+			file.write("Changed\n")
+		os.remove(treePath+"/dir1/file0.txt")
+		self.assertEqual(d.refresh(), [treePath+"/file0.txt", treePath+"/dir1/file0.txt"])
+		self.assertEqual(d.getFile("file0.txt").getStr(), "Doc 0 of tree\n\nLine\n")
+		self.assertEqual(d.getDir("dir1").getFile("file0.txt").getStr(), "Doc 0 of tree/dir1\n\nLine\n")
+		self.assertEqual(d.getFile("copy.txt").getStr(), "File 1 of tree\n\nLine\n")
+		# Written edits are not conflicts anymore
+		d.write()
+		self.assertEqual(d.refresh(), [])
+
+	def test_refreshBinary(self):
+		treePath = self.createTree("tree", depth=1)
+		d = DirFileObj(path=treePath)
+		with open(treePath+"/file0.txt", "wb") as file:
+			file.write(b"\0\1")
+		self.assertEqual(d.refresh(), [])
+		self.assertEqual(d.getFile("file0.txt").getBytes(), b"\0\1")
+
+	## Directories refreshed are saved in snapshots
+	def test_refreshSnapshot(self):
+		treePath = self.createTree("tree", depth=2)
+		d = DirFileObj(path=treePath)
+		with open(treePath+"/new.txt", "w") as file:
+			file.write("New\n")
+		self.setPastTime(treePath)
+		self.assertEqual(d.refresh(), [])
+		snapshotPath = self.testFolder+"/snapshot"
+		d.saveSnapshot(snapshotPath)
+		self.assertIn("", _readSnapshot(snapshotPath)["stateDict"])
+
+	## Directories removed while refreshing are gone
+	def test_refreshRemovedDir(self):
+		treePath = self.createTree("tree", depth=2)
+		d = DirFileObj(path=treePath)
+		dir0 = d.getDir("dir0")
+		scandir = os.scandir
+		def fakeScandir(path):
+			if path.endswith("/dir0"):
+				raise FileNotFoundError(path)
+			return scandir(path)
+		with mock.patch("os.scandir", side_effect=fakeScandir):
+			self.assertEqual(d.refresh(), [])
+		self.assertIsNot(d.getDir("dir0"), dir0)
+
+	# Transforming in other processes
+	def test_transformErrors(self):
+		d = DirFileObj(path=self.testFolder)
+		with self.assertRaises(TypeError):
+			d.transform("strSub")
+		with self.assertRaises(TypeError):
+			d.transform([("strSub", 0, "")])
+		with self.assertRaises(ValueError):
+			d.transform([("strSub", "a")])
+		with self.assertRaises(ValueError):
+			d.transform([("unknown", "a", "b")])
+		with self.assertRaises(TypeError):
+			d.transform([], executor="2")
+
+	def test_transform(self):
+		treePath = self.createTree("tree", depth=3)
+		d = DirFileObj(path=treePath)
+		d.transform([("strSub", "File", "Doc"), ("strSubMany", {"Line":"Row", "tree":"root"}), ("regexSub", "^Doc (\\d)", "Doc #\\1", re.MULTILINE)], executor=2)
+		self.assertEqual(d.find("dir1/dir2/file1.txt").getStr(), "Doc #1 of root/dir1/dir2\n\nRow\n")
+		self.assertTrue(d.find("dir1/dir2/file1.txt").isModified())
+		# Same as editing in this process
+		expectedD = DirFileObj(path=treePath)
+		for fileObj in expectedD.glob("**/*.txt"):
+			fileObj.strSub("File", "Doc")
+		expectedD.strSubMany({"Line":"Row", "tree":"root"})
+		expectedD.regexSub("^Doc (\\d)", "Doc #\\1", re.MULTILINE)
+		self.assertSameTree(expectedD, d)
+		# Other executors
+		with ThreadPoolExecutor(max_workers=2) as executor:
+			d.transform([("strSub", "Row", "Line")], executor=executor)
+		self.assertEqual(d.find("dir1/dir2/file1.txt").getStr(), "Doc #1 of root/dir1/dir2\n\nLine\n")
+		# Files are not read without edits, or with edits that do nothing
+		lazyD = DirFileObj(path=treePath, lazy=True)
+		lazyD.transform([])
+		lazyD.transform([("strSubMany", {})])
+		self.assertFalse(lazyD.isLoaded())
+
+	# Asyncio API
+	def test_areadLimitError(self):
+		with self.assertRaises(TypeError):
+			asyncio.run(DirFileObj.aread(path=self.testFolder, limit="1"))
+		with self.assertRaises(ValueError):
+			asyncio.run(DirFileObj.aread(path=self.testFolder, limit=0))
+
+	def test_aread(self):
+		treePath = self.createTree("tree", depth=3)
+		d = asyncio.run(DirFileObj.aread(path=treePath, limit=2))
+		self.assertFalse(d.isLazy())
+		self.assertTrue(d.getDir("dir1").getDir("dir2").isLoaded())
+		self.assertFalse(d.getDir("dir1").getDir("dir2").getFile("file0.txt").isLazy())
+		self.assertSameTree(DirFileObj(path=treePath), d)
+		lazyD = asyncio.run(DirFileObj.aread(path=treePath, lazy=True))
+		self.assertFalse(lazyD.isLoaded())
+
+	def test_awrite(self):
+		treePath = self.createTree("tree", depth=3)
+		async def copyTree():
+			d = await DirFileObj.aread(path=treePath)
+			copyD = d.copy(name="copy", father=await DirFileObj.aread(path=self.testFolder))
+			copyD.strSubMany({"File":"Doc"})
+			await copyD.awrite(limit=4)
+			return copyD
+		copyD = asyncio.run(copyTree())
+		self.assertFalse(copyD.isDirty())
+		self.assertSameTree(DirFileObj(path=self.testFolder+"/copy"), copyD)
+		self.assertEqual(copyD.find("dir2/dir0/file1.txt").getStr(), "Doc 1 of tree/dir2/dir0\n\nLine\n")
+		d = DirFileObj(path=treePath)
+		d.getFile("file1.txt").strSub("File", "Doc")
+		with open(treePath+"/file1.txt", "w") as file:
+			file.write("Changed\n")
+		self.assertEqual(asyncio.run(d.arefresh()), [treePath+"/file1.txt"])
+
+	# Hashing and comparing trees
+	def test_hash(self):
+		treePath = self.createTree("tree", depth=2)
+		d = DirFileObj(path=treePath)
+		copyD = d.copy(name="copy", father=DirFileObj(path=self.testFolder))
+		self.assertEqual(d.getHash(), copyD.getHash())
+		self.assertNotEqual(d.getDir("dir0").getHash(), d.getDir("dir1").getHash())
+		oldHash = d.getHash()
+		d.getDir("dir1").getFile("file0.txt").strSub("File", "Doc")
+		self.assertNotEqual(d.getHash(), oldHash)
+		self.assertNotEqual(d.getDir("dir1").getHash(), copyD.getDir("dir1").getHash())
+		self.assertEqual(d.getDir("dir0").getHash(), copyD.getDir("dir0").getHash())
+		d.getDir("dir1").getFile("file0.txt").strSub("Doc", "File")
+		self.assertEqual(d.getHash(), oldHash)
+		d.getDir("dir2").removeFile("file1.txt")
+		self.assertNotEqual(d.getHash(), oldHash)
+
+	def test_diffTypeError(self):
+		with self.assertRaises(TypeError):
+			DirFileObj(path=self.testFolder).diff(0)
+
+	def test_diff(self):
+		treePath = self.createTree("tree", depth=2)
+		d = DirFileObj(path=treePath)
+		copyD = d.copy(name="copy", father=DirFileObj(path=self.testFolder))
+		self.assertEqual(d.diff(copyD), [])
+		d.getDir("dir1").getFile("file0.txt").strSub("File", "Doc")
+		d.getDir("dir2").removeFile("file1.txt")
+		d.removeDir("dir0")
+		d.getFile("file0.txt").copy(name="dir0", father=d)
+		copyD.getFile("file2.txt").copy(name="new.txt", father=copyD)
+		self.assertEqual(d.diff(copyD), ["dir0", "dir1/file0.txt", "dir2/file1.txt", "new.txt"])
+		self.assertEqual(copyD.diff(d), ["dir0", "dir1/file0.txt", "dir2/file1.txt", "new.txt"])
+
+	# Finding directories and files
+	def test_findTypeError(self):
+		rootD = DirFileObj(path=self.testFolder)
+		with self.assertRaises(TypeError):
+			rootD.find(0)
+		with self.assertRaises(TypeError):
+			rootD.glob(0)
+
+	def test_findInvalid(self):
+		treePath = self.createTree("tree", depth=2)
+		d = DirFileObj(path=treePath)
+		with self.assertRaises(ValueError):
+			d.find("dir0/invalid.txt")
+		with self.assertRaises(ValueError):
+			d.find("file0.txt/file0.txt")
+		with self.assertRaises(ValueError):
+			d.find("/")
+
+	def test_find(self):
+		treePath = self.createTree("tree")
+		d = DirFileObj(path=treePath)
+		f = d.find("dir1/dir2/file0.txt")
+		self.assertIs(f, d.getDir("dir1").getDir("dir2").getFile("file0.txt"))
+		self.assertIs(d.find("/dir1/dir2/"), d.getDir("dir1").getDir("dir2"))
+		self.assertIs(d.getDir("dir1").find("dir2/file0.txt"), f)
+		# Lazy directories are listed while following path
+		lazyD = DirFileObj(path=treePath, lazy=True)
+		self.assertEqual(lazyD.find("dir1/dir2/file0.txt").path, f.path)
+
+	def test_findAfterChanges(self):
+		treePath = self.createTree("tree", depth=2)
+		rootD = DirFileObj(path=self.testFolder)
+		d = DirFileObj(path=treePath)
+		copyD = d.copy(name="treeCopy", father=rootD)
+		f = rootD.find("treeCopy/dir1/file2.txt")
+		self.assertIs(f, copyD.getDir("dir1").getFile("file2.txt"))
+		self.assertIs(d.find("dir1/file2.txt").root, d)
+		newD = DirFileObj(name="newDir", father=copyD.getDir("dir1"))
+		self.assertIs(rootD.find("treeCopy/dir1/newDir"), newD)
+		copyD.removeDir("dir1")
+		with self.assertRaises(ValueError):
+			rootD.find("treeCopy/dir1/file2.txt")
+		with self.assertRaises(ValueError):
+			rootD.find("treeCopy/dir1/newDir")
+		self.assertEqual([fileObj.path for fileObj in copyD.findByName("file2.txt")], [copyD.path+"/dir0/file2.txt", copyD.path+"/dir2/file2.txt", copyD.path+"/file2.txt"])
+
+	def test_glob(self):
+		treePath = self.createTree("tree", depth=2, fanOut=2)
+		d = DirFileObj(path=treePath, lazy=True)
+		globPathList = lambda dirObj, pattern: [fileObj.path[len(treePath)+1:] for fileObj in dirObj.glob(pattern)]
+		self.assertEqual(globPathList(d, "**/*.txt"), ["dir0/file0.txt", "dir0/file1.txt", "dir1/file0.txt", "dir1/file1.txt", "file0.txt", "file1.txt"])
+		self.assertEqual(globPathList(d, "*/file[!0].txt"), ["dir0/file1.txt", "dir1/file1.txt"])
+		self.assertEqual(globPathList(d, "**/file0.txt"), ["dir0/file0.txt", "dir1/file0.txt", "file0.txt"])
+		self.assertEqual(globPathList(d, "dir?"), ["dir0", "dir1"])
+		self.assertEqual(globPathList(d, "dir1/**"), ["dir1/file0.txt", "dir1/file1.txt"])
+		self.assertEqual(globPathList(d.getDir("dir1"), "*.txt"), ["dir1/file0.txt", "dir1/file1.txt"])
+		self.assertEqual([fileObj.name for fileObj in d.findByExt(".txt")], ["file0.txt", "file1.txt"] * 3)
+		# Finding only lists directories, files are not read
+		self.assertFalse(any(fileObj.isLoaded() for fileObj in d.findByExt(".txt")))
+		# Removed directories still find their own contents
+		dir1 = d.getDir("dir1")
+		d.removeDir("dir1")
+		self.assertEqual(globPathList(d, "**/*.txt"), ["dir0/file0.txt", "dir0/file1.txt", "file0.txt", "file1.txt"])
+		self.assertEqual(globPathList(dir1, "*.txt"), ["dir1/file0.txt", "dir1/file1.txt"])
+
+	def test_walk(self):
+		treePath = self.createTree("tree", depth=2, fanOut=2)
+		d = DirFileObj(path=treePath, lazy=True)
+		self.assertRaises(TypeError, lambda: list(d.walk(topdown=1)))
+		fileNameList = ["file0.txt", "file1.txt"]
+		self.assertEqual(list(d.walk()), [("", ["dir0", "dir1"], fileNameList), ("dir0", [], fileNameList), ("dir1", [], fileNameList)])
+		self.assertEqual([relPath for (relPath, dirList, fileList) in d.walk(topdown=False)], ["dir0", "dir1", ""])
+		# Files are not read while walking
+		self.assertFalse(d.getDir("dir0").getFile("file0.txt").isLoaded())
+		# Directories removed from list are skipped
+		relPathList = []
+		for (relPath, dirList, fileList) in d.walk():
+			relPathList.append(relPath)
+			dirList.remove("dir0") if "dir0" in dirList else None
+		self.assertEqual(relPathList, ["", "dir1"])
+
+	def test_deepTree(self):
+		# Deeper than recursion limit, that is lowered so test tree can still be created and removed
+		depth = 300
+		treePath = self.testFolder+"/deep"
+		dirPath = treePath
+		for idx in range(depth+1):
+			os.mkdir(dirPath)
+			dirPath += "/d"
+		with open(treePath + "/d" * depth + "/file.txt", "w") as file:
+			file.write("deep\n")
+		recursionLimit = sys.getrecursionlimit()
+		sys.setrecursionlimit(200)
+		try:
+			d = DirFileObj(path=treePath)
+			self.assertEqual(len(list(d.walk())), depth+1)
+			self.assertEqual(next(d.walk(topdown=False))[2], ["file.txt"])
+			copyD = d.copy(name="deepCopy", father=DirFileObj(path=self.testFolder, lazy=True))
+			copyD.write()
+			self.assertEqual(d.getHash(), copyD.getHash())
+			self.assertEqual(d.diff(DirFileObj(path=self.testFolder+"/deepCopy")), [])
+			with open(treePath + "/d" * depth + "/new.txt", "w") as file:
+				file.write("new\n")
+			self.assertEqual(d.refresh(), [])
+		finally:
+			sys.setrecursionlimit(recursionLimit)
+		with open(self.testFolder + "/deepCopy" + "/d" * depth + "/file.txt") as file:
+			self.assertEqual(file.read(), "deep\n")
+		self.assertEqual(d.find("d/" * depth + "new.txt").getStr(), "new\n")
+
+	def test_readListedStat(self):
+		treePath = self.createTree("tree", depth=3, fanOut=2)
+		d = DirFileObj(path=treePath, lazy=True)
+		d.getDirList()
+		# Kids get their stat from the listing of their father, so they do not stat again
+		with mock.patch("os.stat", side_effect=AssertionError("Unexpected stat")), \
+		     mock.patch("os.path.exists", side_effect=AssertionError("Unexpected exists")):
+			self.assertEqual(len(d.glob("**/*.txt")), 14)
+		f = d.getDir("dir1").getFile("file0.txt")
+		self.assertEqual(f.getStr(), "File 0 of tree/dir1\n\nLine\n")
+		self.assertFalse(f._isChangedOnDisk(f._statKey(f.path)))
+		self.assertEqual(d.refresh(), [])
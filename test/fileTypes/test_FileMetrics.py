@@ -0,0 +1,119 @@
+## \file test_FileMetrics.py
+#  \brief Testcases for FileMetrics class
+#
+# Revision | Author            | Date     | Comment
+#:---------|:------------------|:---------|:----------------
+# 1.0      | pytomation team   | 10/18/26 | Initial version
+#
+import unittest
+import os
+import sys
+import shutil
+import time
+sys.path.append(os.path.realpath("../pytomation/fileTypes"))
+from DirFileObj import DirFileObj
+from FileMetrics import FileMetrics
+
+class FileMetricsTest(unittest.TestCase):
+
+	def setUp(self):
+		self.rootFolder = "./"
+		self.testFolderName = ".FileMetricsTest"
+		self.testFolder = os.path.realpath(self.rootFolder+self.testFolderName)
+		# Create it
+		try:
+			os.mkdir(self.testFolder)
+		except Exception as e:
+			raise RuntimeError("Error trying to create directory %s: %s" % (self.testFolder,str(e)))
+		# Tree with 2 files in root and in its subdirectory
+		self.treePath = self.testFolder+"/tree"
+		os.makedirs(self.treePath+"/sub")
+		for path in ["file0.txt", "file1.txt", "sub/file2.txt", "sub/file3.txt"]:
+			with open(self.treePath+"/"+path, "w") as file:
+				file.write("0123456789\n")
+
+	def tearDown(self):
+		shutil.rmtree(self.testFolder)
+
+	## Bad inputs
+	def test_badInputs(self):
+		self.assertRaises(TypeError, FileMetrics, slowestCount="1")
+		self.assertRaises(ValueError, FileMetrics, slowestCount=-1)
+		self.assertRaises(TypeError, FileMetrics, callback=1)
+		self.assertRaises(TypeError, FileMetrics().span, 1)
+		self.assertRaises(RuntimeError, FileMetrics().disable)
+
+	## Nothing is recorded when metrics are not enabled
+	def test_disabled(self):
+		metrics = FileMetrics()
+		DirFileObj(path=self.treePath)
+		self.assertEqual(metrics.getCount(), 0)
+		self.assertEqual(metrics.getOperations(), [])
+
+	## Reads, copies and writes are counted
+	def test_counters(self):
+		os.mkdir(self.testFolder+"/out")
+		with FileMetrics() as metrics:
+			d = DirFileObj(path=self.treePath)
+			c = d.copy(name="copy", father=DirFileObj(path=self.testFolder+"/out"))
+			c.getDir("sub").getFile("file2.txt").strSub("0", "00")
+			c.write()
+		self.assertEqual(metrics.getOperations(), ["copyDir", "copyFile", "readDir", "readFile", "writeDir", "writeFile"])
+		self.assertEqual(metrics.getCount("readFile"), 4)
+		self.assertEqual(metrics.getBytes("readFile"), 44)
+		self.assertEqual(metrics.getCount("readDir"), 3)
+		self.assertEqual(metrics.getBytes("readDir"), 0)
+		self.assertEqual(metrics.getCount("copyFile"), 4)
+		self.assertEqual(metrics.getCount("copyDir"), 2)
+		self.assertEqual(metrics.getCount("writeFile"), 4)
+		self.assertEqual(metrics.getBytes("writeFile"), 45)
+		self.assertEqual(metrics.getCount("writeDir"), 2)
+		self.assertEqual(metrics.getBytes(), 89)
+		self.assertAlmostEqual(metrics.getTime(), sum(metrics.getTime(op) for op in metrics.getOperations()))
+		# Metrics are disabled again
+		DirFileObj(path=self.treePath)
+		self.assertEqual(metrics.getCount("readFile"), 4)
+		metrics.reset()
+		self.assertEqual(metrics.getCount(), 0)
+
+	## Slowest operations are kept, slowest first
+	def test_slowest(self):
+		metrics = FileMetrics(slowestCount=2)
+		for (seconds, path) in [(0.2, "a"), (0.5, "b"), (0.1, "c"), (0.3, "d")]:
+			metrics.record("writeFile", path, seconds, 1)
+		self.assertEqual(metrics.getSlowest(), [(0.5, "writeFile", "b"), (0.3, "writeFile", "d")])
+		self.assertEqual(metrics.getCount("writeFile"), 4)
+		self.assertAlmostEqual(metrics.getTime("writeFile"), 1.1)
+		self.assertEqual(len(metrics.getSummary().splitlines()), 4)
+
+	## Callbacks get every operation, and nested spans have exclusive times
+	def test_spans(self):
+		recordList = []
+		metrics = FileMetrics(callback=lambda *args: recordList.append(args))
+		with metrics.span("outer", "x") as outer:
+			time.sleep(0.01)
+			with metrics.span("inner", "y") as inner:
+				inner.size = 3
+				time.sleep(0.05)
+		self.assertEqual([(op, path, size) for (op, path, seconds, size) in recordList], [("inner", "y", 3), ("outer", "x", None)])
+		self.assertLess(metrics.getTime("outer"), metrics.getTime("inner"))
+		self.assertEqual(metrics.getBytes("inner"), 3)
+		# Spans record operations of files
+		with metrics:
+			DirFileObj(path=self.treePath)
+		self.assertIn(("readDir", self.treePath), [(op, path) for (op, path, seconds, size) in recordList])
+		self.assertEqual(len(recordList), 2+2+4)
+
+	## Metrics can be nested
+	def test_nested(self):
+		outer = FileMetrics()
+		inner = FileMetrics()
+		with outer:
+			with inner:
+				DirFileObj(path=self.treePath+"/sub")
+			DirFileObj(path=self.treePath+"/sub")
+		self.assertEqual(inner.getCount("readFile"), 2)
+		self.assertEqual(outer.getCount("readFile"), 2)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -8,7 +8,9 @@
 import unittest
 import os
 import sys
+import re
 import shutil
+from unittest import mock
 sys.path.append(os.path.realpath("../pytomation/fileTypes"))
 from DirFileObj import DirFileObj
 from TextFileObj import TextFileObj
@@ -56,6 +58,12 @@ class TextFileObjTest(unittest.TestCase):
 		expectedFileContent += ""
 		self.assertEqual(tfo.getStr(),expectedFileContent)
 
+	def test_constructorPathLazy(self):
+		tfo = TextFileObj(path=self.readFilePath, lazy=True)
+		self.assertFalse(tfo.isLoaded())
+		self.assertEqual(tfo.getStr().split("\n")[0],"Sample File")
+		self.assertTrue(tfo.isLoaded())
+
 	def test_constructorFatherNameTypeError(self):
 		with self.assertRaises(TypeError):
 			TextFileObj(name=0,father=self.testDir)
@@ -195,6 +203,19 @@ class TextFileObjTest(unittest.TestCase):
 		expectedFileContent += ""
 		self.assertEqual(newTf.getStr(), expectedFileContent)
 
+	def test_strSubAfterCopy(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		newTf = tf.copy(name="tmp", father=self.testDir)
+		tf.strSub(findStr="Sample",replaceStr="Example")
+		self.assertEqual(tf.getStr().split("\n")[0], "Example File")
+		self.assertEqual(newTf.getStr().split("\n")[0], "Sample File")
+		newTf.strSub(findStr="Sample",replaceStr="Copy")
+		newTf.regexSub(pattern="Regexp$", repl="Pattern")
+		self.assertEqual(tf.getStr().split("\n")[0], "Example File")
+		self.assertEqual(tf.getStr().split("\n")[6], "MyRegexp")
+		self.assertEqual(newTf.getStr().split("\n")[0], "Copy File")
+		self.assertEqual(newTf.getStr().split("\n")[6], "MyPattern")
+
 	def test_strSubDoubleFile(self):
 		newFile0Name = "tmp0"
 		newFile1Name = "tmp1"
@@ -222,3 +243,256 @@ class TextFileObjTest(unittest.TestCase):
 		expectedFileContent += ""
 		self.assertEqual(newTf0.getStr(), expectedOriginalFileContent)
 		self.assertEqual(newTf1.getStr(), expectedFileContent)
+
+	## Substituting many strings in a single pass
+	def test_strSubManyTypeError(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		with self.assertRaises(TypeError):
+			tf.strSubMany(mapping=[("Sample","Example")])
+		with self.assertRaises(TypeError):
+			tf.strSubMany(mapping={"Sample":0})
+
+	def test_strSubManyEmptyKey(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		with self.assertRaises(ValueError):
+			tf.strSubMany(mapping={"":"Example"})
+
+	def test_strSubMany(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		newTf = tf.copy(name="tmp", father=self.testDir)
+		# Longest key wins, and replaced text is not replaced again
+		newTf.strSubMany(mapping={"For":"0", "For Regexp":"1", "1":"For", "Sample":"Example", "Regexp":"2"})
+		expectedFileContent  = "Example File\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "1 1 1\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "1\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "My2\n"
+		expectedFileContent += ""
+		self.assertEqual(newTf.getStr(), expectedFileContent)
+		self.assertTrue(newTf.isModified())
+		self.assertEqual(tf.getStr().split("\n")[0], "Sample File")
+
+	def test_strSubManyMultiLine(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		tf.strSubMany(mapping={"File\n\nFor":"File For", "MyRegexp\n":"End"})
+		expectedFileContent  = "Sample File For Regexp For Regexp For Regexp\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "For Regexp\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "End\n"
+		expectedFileContent += ""
+		self.assertEqual(tf.getStr(), expectedFileContent)
+
+	def test_strSubManyNoMatch(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		tf.strSubMany(mapping={"Invalid":"Example"})
+		self.assertFalse(tf.isModified())
+
+	## Substituting regexps
+	def test_regexSubTypeError(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		with self.assertRaises(TypeError):
+			tf.regexSub(pattern=0, repl="Example")
+		with self.assertRaises(TypeError):
+			tf.regexSub(pattern="Sample", repl=0)
+		with self.assertRaises(TypeError):
+			tf.regexSub(pattern="Sample", repl="Example", flags="i")
+
+	def test_regexSubInvalidPattern(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		with self.assertRaises(ValueError):
+			tf.regexSub(pattern="(Sample", repl="Example")
+		with self.assertRaises(ValueError):
+			tf.regexSub(pattern=re.compile("Sample"), repl="Example", flags=re.I)
+
+	def test_regexSub(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		tf.regexSub(pattern="(\\w+) Regexp", repl="\\1 Pattern")
+		tf.regexSub(pattern=re.compile("^sample", re.I|re.M), repl=lambda match: "Example")
+		expectedFileContent  = "Example File\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "For Pattern For Pattern For Pattern\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "For Pattern\n"
+		expectedFileContent += "\n"
+		expectedFileContent += "MyRegexp\n"
+		expectedFileContent += ""
+		self.assertEqual(tf.getStr(), expectedFileContent)
+
+	def test_regexSubMultiLine(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		tf.regexSub(pattern="\\n\\n+", repl="\\n")
+		tf.regexSub(pattern="For.*For Regexp$", repl="Line", flags=re.DOTALL|re.MULTILINE)
+		self.assertEqual(tf.getStr(), "Sample File\nLine\nMyRegexp\n")
+		tf.regexSub(pattern="\\n$", repl="")
+		self.assertEqual(tf.getStr(), "Sample File\nLine\nMyRegexp\n")
+
+	## Streaming files
+	def test_constructorStreamTypeError(self):
+		with self.assertRaises(TypeError):
+			TextFileObj(path=self.subReadFilePath, stream=1)
+
+	def test_streamSub(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		streamTf = TextFileObj(path=self.subReadFilePath, stream=True)
+		self.assertTrue(streamTf.isStream())
+		self.assertEqual(streamTf.getStr(), tf.getStr())
+		streamTf = streamTf.copy(name="tmp", father=self.testDir)
+		# Use tiny chunks, so matches span chunk boundaries
+		streamTf.streamChunkSize = 3
+		for editTf in [tf, streamTf]:
+			editTf.strSub(findStr="Regexp",replaceStr="Pattern")
+			editTf.strSubMany(mapping={"File\n\nFor":"File For", "Pattern For":"For"})
+			editTf.regexSub(pattern="^My(\\w+)$", repl="Your \\1", flags=re.M)
+		self.assertTrue(streamTf.isModified())
+		self.assertEqual(streamTf.getStr(), tf.getStr())
+		streamTf.write()
+		self.assertFalse(streamTf.isDirty())
+		self.assertEqual(TextFileObj(path=self.testFolder+"/tmp").getStr(), tf.getStr())
+		self.assertEqual(streamTf.getStr(), tf.getStr())
+
+	def test_streamWriteMode(self):
+		shutil.copy(self.subReadFilePath, self.testFolder+"/mode.txt")
+		os.chmod(self.testFolder+"/mode.txt", 0o644)
+		streamTf = TextFileObj(path=self.testFolder+"/mode.txt", stream=True)
+		streamTf.strSub(findStr="Regexp",replaceStr="Pattern")
+		streamTf.write()
+		self.assertEqual(os.stat(self.testFolder+"/mode.txt").st_mode & 0o777, 0o644)
+		# New files get the same mode as files created by open
+		newTf = streamTf.copy(name="new.txt", father=self.testDir)
+		newTf.strSub(findStr="Pattern",replaceStr="Regexp")
+		newTf.write()
+		with open(self.testFolder+"/open.txt", "w"):
+			pass
+		self.assertEqual(os.stat(self.testFolder+"/new.txt").st_mode, os.stat(self.testFolder+"/open.txt").st_mode)
+
+	def test_streamSourceChanged(self):
+		srcPath = self.testFolder+"/src.txt"
+		with open(srcPath, "w") as file:
+			file.write("Sample File\n")
+		streamTf = TextFileObj(path=srcPath, stream=True)
+		copyTf = streamTf.copy(name="tmp", father=self.testDir)
+		streamTf.strSub(findStr="Sample",replaceStr="Example File")
+		streamTf.write()
+		self.assertEqual(streamTf.getStr(), "Example File File\n")
+		with self.assertRaises(RuntimeError):
+			copyTf.write()
+
+	def test_writeCopySameBytes(self):
+		tf = TextFileObj(path=self.readFilePath)
+		newTf = tf.copy(name="tmp", father=self.testDir)
+		newTf.write()
+		with open(self.readFilePath, "rb") as file:
+			expectedFileContent = file.read()
+		with open(self.testFolder+"/tmp", "rb") as file:
+			self.assertEqual(file.read(), expectedFileContent)
+		self.assertFalse(newTf.isDirty())
+
+	def test_writeCopyLineBreaks(self):
+		srcPath = self.testFolder+"/src.txt"
+		with open(srcPath, "wb") as file:
+			file.write(b"Sample File\r\nLast Line")
+		copyTf = TextFileObj(path=srcPath).copy(name="tmp", father=self.testDir)
+		copyTf.write()
+		with open(self.testFolder+"/tmp", "rb") as file:
+			self.assertEqual(file.read(), b"Sample File\nLast Line\n")
+
+	def test_writeCopySourceChanged(self):
+		srcPath = self.testFolder+"/src.txt"
+		with open(srcPath, "w") as file:
+			file.write("Sample File\n")
+		copyTf = TextFileObj(path=srcPath).copy(name="tmp", father=self.testDir)
+		with open(srcPath, "w") as file:
+			file.write("Changed Sample File\n")
+		copyTf.write()
+		with open(self.testFolder+"/tmp") as file:
+			self.assertEqual(file.read(), "Sample File\n")
+
+	def test_refresh(self):
+		srcPath = self.testFolder+"/src.txt"
+		with open(srcPath, "w") as file:
+			file.write("Sample File\n")
+		tf = TextFileObj(path=srcPath)
+		self.assertEqual(tf.refresh(), [])
+		with open(srcPath, "w") as file:
+			file.write("Changed Sample File\n")
+		self.assertEqual(tf.refresh(), [])
+		self.assertEqual(tf.getStr(), "Changed Sample File\n")
+		tf.strSub(findStr="Sample",replaceStr="Example")
+		with open(srcPath, "w") as file:
+			file.write("Sample File Changed Again\n")
+		self.assertEqual(tf.refresh(), [srcPath])
+		self.assertEqual(tf.getStr(), "Changed Example File\n")
+
+	def test_hash(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		newTf = tf.copy(name="tmp", father=self.testDir)
+		self.assertEqual(tf.getHash(), newTf.getHash())
+		newTf.strSub(findStr="Sample",replaceStr="Example")
+		self.assertNotEqual(tf.getHash(), newTf.getHash())
+		newTf.strSub(findStr="Example",replaceStr="Sample")
+		self.assertEqual(tf.getHash(), newTf.getHash())
+		# Files in stream mode are hashed one chunk at a time
+		streamTf = TextFileObj(path=self.subReadFilePath, stream=True)
+		streamTf.streamChunkSize = 3
+		with mock.patch.object(TextFileObj, "getStr", side_effect=AssertionError):
+			self.assertEqual(streamTf.getHash(), tf.getHash())
+
+	def test_getLine(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		self.assertEqual(tf.getLineCount(), 7)
+		self.assertEqual(tf.getLine(0), "Sample File")
+		self.assertEqual(tf.getLine(1), "")
+		self.assertEqual(tf.getLine(6), "MyRegexp")
+		with self.assertRaises(TypeError):
+			tf.getLine("0")
+		with self.assertRaises(ValueError):
+			tf.getLine(7)
+		with self.assertRaises(ValueError):
+			tf.getLine(-1)
+		tf.strSub(findStr="Sample",replaceStr="Example\nNew")
+		self.assertEqual(tf.getLineCount(), 8)
+		self.assertEqual(tf.getLine(1), "New File")
+		with self.assertRaises(RuntimeError):
+			TextFileObj(path=self.subReadFilePath, stream=True).getLineCount()
+
+	def test_strSubNoMatch(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		tf.strSub(findStr="Missing",replaceStr="Example")
+		tf.strSub(findStr="File\n",replaceStr="Example")
+		self.assertFalse(tf.isModified())
+		tf.strSub(findStr="",replaceStr="|")
+		self.assertEqual(tf.getLine(0), "|S|a|m|p|l|e| |F|i|l|e|")
+		self.assertEqual(tf.getLine(1), "|")
+
+	def test_iterLines(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		self.assertEqual(list(tf.iterLines()), tf.getStr().split("\n")[:-1])
+		tf.streamChunkSize = 3
+		self.assertEqual(list(tf.iterLines()), tf.getStr().split("\n")[:-1])
+		streamTf = TextFileObj(path=self.subReadFilePath, stream=True)
+		streamTf.streamChunkSize = 5
+		self.assertEqual(list(streamTf.iterLines()), tf.getStr().split("\n")[:-1])
+
+	def test_iterChunks(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		with self.assertRaises(TypeError):
+			list(tf.iterChunks("1"))
+		with self.assertRaises(ValueError):
+			list(tf.iterChunks(0))
+		chunkList = list(tf.iterChunks(4))
+		self.assertEqual("".join(chunkList), tf.getStr())
+		self.assertTrue(all(len(chunk) == 4 for chunk in chunkList[:-1]))
+		streamTf = TextFileObj(path=self.subReadFilePath, stream=True)
+		self.assertEqual("".join(streamTf.iterChunks(4)), tf.getStr())
+
+	def test_writeChunks(self):
+		tf = TextFileObj(path=self.subReadFilePath)
+		newTf = tf.copy(name="tmp", father=self.testDir)
+		newTf.writeBufferSize = 5
+		newTf.strSub(findStr="Sample",replaceStr="Example")
+		newTf.write()
+		with open(self.testFolder+"/tmp") as file:
+			self.assertEqual(file.read(), newTf.getStr())